@@ -1,64 +1,260 @@
 # api_server.py
-from flask import Flask, jsonify, request
-from trading_bot import ForexTradingBot
+from flask import Flask, Response, g, jsonify, request, stream_with_context
+from cache import ResponseCache
+from log_config import configure_logging
+from metrics import HTTP_REQUEST, REGISTRY
+from mt5_gateway import DASHBOARD, TIMEFRAME_M1, GatewayTimeout, get_gateway, proxy
+from scheduler import TIMEFRAME_NAMES, TIMEFRAME_SECONDS
+from serialization import FORMATS, EncodedBody, encode_chart, encode_json
+from stream import MarketFeed, position_row
+import argparse
+import json
+import logging
+import os
 import threading
-import MetaTrader5 as mt5
+import time
+
+try:
+    from flask_sock import Sock
+except ImportError:  # WebSocket push is optional; SSE needs nothing extra
+    Sock = None
+
+logger = logging.getLogger(__name__)
+
+# Handlers reach the terminal through the shared gateway at dashboard
+# priority: queued behind the trading engine, and given up on after
+# MT5_TIMEOUT rather than holding a worker thread
+MT5_TIMEOUT = 2.0
+mt5 = proxy(DASHBOARD, timeout=MT5_TIMEOUT)
 
 app = Flask(__name__)
-bot = ForexTradingBot()
 
-# Run bot in separate thread
-bot_thread = threading.Thread(target=bot.run)
-bot_thread.daemon = True
-bot_thread.start()
-@app.route('/api/trades', methods=['GET'])
-def get_active_trades():
+# Per-endpoint TTLs in seconds; chart entries also drop when a bar closes
+cache = ResponseCache(ttls={'trades': 1.0, 'account': 5.0, 'chart': 2.0})
+
+BACKTEST_REPORT = 'backtest_report.json'
+STREAM_HEARTBEAT = 15.0  # seconds between keep-alives on an idle stream
+
+# The trading engine, created by start_engine() rather than at import
+bot = None
+bot_thread = None
+feed = None  # one terminal poller shared by every /api/stream and /ws client
+engine_ready = threading.Event()  # set once the bot exists and its loop is running
+engine_error = None  # last startup failure, for /api/ready
+_engine_lock = threading.Lock()
+_startup_thread = None
+_started_at = time.time()
+
+ENGINE_RETRY = 5.0  # seconds between attempts to reach the terminal at startup
+# Answer while the engine is still starting; everything else waits for it
+ENGINE_FREE_ENDPOINTS = {'health', 'ready', 'metrics', 'static'}
+
+
+def _build_engine():
+    """Import the strategy stack and connect, retrying until the terminal answers"""
+    global bot, bot_thread, feed, engine_error
+    # xgboost, pandas and the rest load here, off the import path, so the
+    # API is serving health checks while they do
+    from trading_bot import ForexTradingBot
+
+    while True:
+        try:
+            engine = ForexTradingBot()
+            break
+        except ConnectionError as e:
+            engine_error = str(e)
+            logger.warning("Engine start failed, retrying",
+                           extra={'error': engine_error, 'retry_s': ENGINE_RETRY})
+            time.sleep(ENGINE_RETRY)
+        except Exception as e:
+            engine_error = f"{type(e).__name__}: {e}"
+            logger.exception("Engine start failed")
+            return
+    engine.bar_store.listeners.append(
+        lambda symbol, timeframe: cache.invalidate('chart', symbol))
+    feed = MarketFeed(engine.bar_store, engine.symbols)
+    bot = engine
+    engine_error = None
+    bot_thread = threading.Thread(target=bot.run, name='trading-engine', daemon=True)
+    bot_thread.start()
+    engine_ready.set()
+    logger.info("Engine started", extra={'startup_s': round(time.time() - _started_at, 2)})
+
+
+def start_engine(wait=False):
+    """Create the trading bot and run its loop on its own thread (once)
+
+    Startup runs in the background so the API answers /api/health at
+    once; pass wait=True to block until the bot is running.
+    """
+    global _startup_thread
+    with _engine_lock:
+        if _startup_thread is None:
+            _startup_thread = threading.Thread(target=_build_engine, name='engine-startup',
+                                               daemon=True)
+            _startup_thread.start()
+    if wait:
+        # Gives up, returning None, if startup failed outright
+        while not engine_ready.wait(0.1) and _startup_thread.is_alive():
+            pass
+    return bot
+
+
+def create_app():
+    """WSGI entry point that also starts the engine
+
+    The engine, its MT5 gateway and the caches live in this process, so
+    run one worker with many threads, e.g.
+    gunicorn 'api_server:create_app()' --worker-class gthread --workers 1 --threads 64
+    """
+    configure_logging()
+    start_engine()
+    return app
+
+
+# Scraped alongside the histograms; read when /api/metrics is requested
+REGISTRY.gauge('tradify_mt5_queue_depth', "Calls waiting for the gateway thread",
+               callback=lambda: get_gateway().pending())
+REGISTRY.gauge('tradify_stream_subscribers', "Open /api/stream and /ws clients",
+               callback=lambda: feed.subscriber_count() if feed is not None else 0)
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.before_request
+def require_engine():
+    if not engine_ready.is_set() and request.endpoint not in ENGINE_FREE_ENDPOINTS:
+        response = jsonify({'error': 'Trading engine starting, try again', 'statusCode': 503})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+
+
+@app.route('/api/health', methods=['GET'])
+def health():
+    """Liveness: the process is up and serving; never touches the engine"""
+    return jsonify({'status': 'ok', 'uptime': round(time.time() - _started_at, 3)})
+
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness: connected to the terminal, loop running and a model loaded"""
+    checks = {
+        'engine': engine_ready.is_set(),
+        'mt5': bot is not None,  # the bot only exists once initialize() succeeded
+        'model': bot is not None and bot.model is not None,
+    }
+    body = {'ready': all(checks.values()), 'checks': checks,
+            'uptime': round(time.time() - _started_at, 3)}
+    if engine_error:
+        body['error'] = engine_error
+    if bot is not None:
+        body['modelVersion'] = bot.model_registry.version
+    return jsonify(body), 200 if body['ready'] else 503
+
+
+@app.after_request
+def record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # Route templates, not paths, so /api/chart/<symbol> stays one series.
+        # Streams are timed until their first byte, not for their lifetime.
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_REQUEST.observe(time.perf_counter() - start, method=request.method,
+                             route=rule, status=response.status_code)
+    return response
+
+
+@app.errorhandler(GatewayTimeout)
+def terminal_busy(e):
+    return jsonify({'error': 'Trading terminal busy, try again', 'statusCode': 503}), 503
+
+
+def fetch_active_trades():
     positions = mt5.positions_get()
-    print(positions)
 
     if positions is None:
-        print("positions_get() failed, error code:", mt5.last_error())
-        return jsonify({
+        logger.error("positions_get() failed", extra={'error': mt5.last_error()})
+        return {
             'statusCode': 500,
             'error': 'Failed to retrieve positions',
             'code': mt5.last_error()
-        }), 500
+        }, 500
 
+    # One tick lookup per symbol, however many positions share it
+    ticks = {}
     trades = []
     for pos in positions:
-        trades.append({
-            'symbol': pos.symbol,
-            'direction': 'long' if pos.type == mt5.ORDER_TYPE_BUY else 'short',
-            'entryPrice': pos.price_open,
-            'currentPrice': mt5.symbol_info_tick(pos.symbol).bid if pos.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(pos.symbol).ask,
-            'lotSize': pos.volume,
-            'profitLoss': pos.profit
-        })
-
-    return jsonify({
+        if pos.symbol not in ticks:
+            ticks[pos.symbol] = mt5.symbol_info_tick(pos.symbol)
+        trades.append(position_row(pos, ticks[pos.symbol]))
+
+    return {
         'message': 'Trades fetched successfully',
         'statusCode': 200,
         'data': trades
-    }), 200
+    }, 200
 
 
-@app.route('/api/account', methods=['GET'])
-def account_info():
+@app.route('/api/trades', methods=['GET'])
+def get_active_trades():
+    def compute():
+        payload, status = fetch_active_trades()
+        return EncodedBody(encode_json(payload)), status
+
+    body, status = cache.get_or_compute(('trades',), compute)
+    return encoded_response(body, 'application/json', status)
+
+
+def fetch_account_info():
     info = mt5.account_info()
     if info is None:
-        return jsonify({'error': 'Not connected to MT5', 'code': mt5.last_error()})
-    return jsonify(info._asdict())
+        return {'error': 'Not connected to MT5', 'code': mt5.last_error()}
+    return info._asdict()
+
+
+@app.route('/api/account', methods=['GET'])
+def account_info():
+    return jsonify(cache.get_or_compute(('account',), fetch_account_info))
 
 @app.route('/api/stats', methods=['GET'])
 def get_trade_stats():
-    # This would query historical trades and calculate stats
-    stats = {
-        'Win Rate': '65%',
-        'Avg Win': '$120',
-        'Avg Loss': '$80',
-        'Profit Factor': 1.8
-    }
-    return jsonify(stats)
+    from backtest import format_stats
+
+    # Live numbers from the journal's running totals; no history scan
+    stats = bot.journal.stats(request.args.get('symbol'))
+    if stats['trades']:
+        return jsonify(format_stats(stats))
+    
+    # Before the first closed trade, the latest `python backtest.py` run
+    if os.path.exists(BACKTEST_REPORT):
+        with open(BACKTEST_REPORT) as f:
+            return jsonify(format_stats(json.load(f)['stats']))
+    return jsonify(format_stats(stats))
+
+
+@app.route('/api/journal/<kind>', methods=['GET'])
+def journal_entries(kind):
+    """Newest signals, orders or closed trades; ?symbol=, ?since=, ?until= (epoch s), ?limit="""
+    queries = {'signals': bot.journal.signals, 'orders': bot.journal.orders,
+               'trades': bot.journal.trades}
+    if kind not in queries:
+        return jsonify({'error': f"Unknown journal '{kind}', expected one of "
+                                 f"{', '.join(queries)}", 'statusCode': 404}), 404
+    try:
+        since, until = (float(request.args[name]) if name in request.args else None
+                        for name in ('since', 'until'))
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= 1000:
+        return jsonify({'error': 'Expected numeric since/until and 0 < limit <= 1000',
+                        'statusCode': 400}), 400
+    rows = queries[kind](request.args.get('symbol'), since, until, limit)
+    return Response(encode_json({'data': rows, 'statusCode': 200}), mimetype='application/json')
 
 @app.route('/api/config', methods=['POST'])
 def update_config():
@@ -86,34 +282,166 @@ def update_config():
     
     # return jsonify(chart_data)
 
+def encoded_response(body, content_type, status=200):
+    """Response from pre-encoded bytes or an EncodedBody, gzipped if the client accepts it"""
+    if not isinstance(body, EncodedBody):
+        body = EncodedBody(body)
+    body, encoding = body.for_client(request.headers.get('Accept-Encoding'))
+    response = Response(body, status=status, content_type=content_type)
+    response.headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def fetch_chart_data(symbol, timeframe=TIMEFRAME_M1, count=100, fmt='rows'):
+    bars = bot.bar_store.bars(symbol, timeframe, count, priority=DASHBOARD, timeout=MT5_TIMEOUT)
+
+    if bars is None:
+        return encode_json({
+            'error': f"No chart data available for symbol '{symbol}'",
+            'statusCode': 404
+        }), 'application/json', 404
+
+    # Encoded straight from the bar arrays, without a DataFrame; cached
+    # with its gzipped form so hits only copy bytes
+    body, content_type = encode_chart(bars, fmt)
+    return EncodedBody(body), content_type, 200
+
+
 @app.route('/api/chart/<symbol>', methods=['GET'])
 def get_chart_data(symbol):
-    info = mt5.symbol_info("GBPUSD")
-    if info is None:
-        print("GBPUSD is not a valid symbol on this account.")
-    else:
-        print(info)
+    """Bars as rows (default), ?format=columns or ?format=binary
 
-    df = bot.get_price_data(symbol)
-
-    if df.empty:
+    ?timeframe= takes M1 (default) to D1; ?count= up to the bar store
+    capacity. Binary bodies are int64 epoch times followed by float64
+    open, high, low and close, each a column of X-Bar-Count values.
+    """
+    if symbol not in bot.symbols:
+        # Checked before the cache and bar store, which would otherwise
+        # keep an entry for every name anyone asks for
         return jsonify({
             'error': f"No chart data available for symbol '{symbol}'",
             'statusCode': 404
         }), 404
 
-    chart_data = []
-    for _, row in df.iterrows():
-        chart_data.append({
-            'time': row['time'].isoformat(),
-            'open': row['open'],
-            'high': row['high'],
-            'low': row['low'],
-            'close': row['close']
-        })
+    timeframe = TIMEFRAME_NAMES.get(request.args.get('timeframe', 'M1').upper())
+    fmt = request.args.get('format', 'rows')
+    try:
+        count = int(request.args.get('count', 100))
+    except ValueError:
+        count = 0
+    if timeframe is None or fmt not in FORMATS or not 0 < count <= bot.bar_store.capacity:
+        return jsonify({
+            'error': f"Expected timeframe in {list(TIMEFRAME_NAMES)}, format in {list(FORMATS)} "
+                     f"and 0 < count <= {bot.bar_store.capacity}",
+            'statusCode': 400
+        }), 400
+
+    # Never serve candles across a bar close, even within the TTL
+    period = TIMEFRAME_SECONDS[timeframe]
+    ttl = min(cache.ttls['chart'], period - time.time() % period)
+    body, content_type, status = cache.get_or_compute(
+        ('chart', symbol, timeframe, count, fmt),
+        lambda: fetch_chart_data(symbol, timeframe, count, fmt), ttl=ttl)
+    response = encoded_response(body, content_type, status)
+    if fmt == 'binary' and status == 200:
+        response.headers['X-Bar-Count'] = str(len(body) // 40)
+    return response
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of the latency histograms and counters"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/cache', methods=['GET'])
+def cache_stats():
+    return jsonify(cache.stats())
+
+
+@app.route('/api/model', methods=['GET'])
+def model_status():
+    return jsonify(bot.model_registry.status())
+
+
+@app.route('/api/model', methods=['POST'])
+def activate_model():
+    # Loads and warms up in the background; the old model serves until then.
+    # Naming a version pins it against the watcher; omitting it unpins and
+    # goes back to following the latest.
+    version = (request.json or {}).get('version')
+    if version is not None and version not in bot.model_registry.versions():
+        return jsonify({'error': f"Unknown model version '{version}'"}), 404
+    bot.model_registry.pinned = version is not None
+    bot.model_registry.activate_async(version)
+    return jsonify({'status': 'loading', 'version': version or bot.model_registry.latest_version()}), 202
+
+
+def stream_symbols():
+    symbols = request.args.get('symbols')
+    return [s.strip() for s in symbols.split(',') if s.strip()] if symbols else None
 
-    return jsonify(chart_data)
+
+@app.route('/api/stream', methods=['GET'])
+def stream():
+    """Server-Sent Events: a snapshot, then bar, tick and position deltas"""
+    subscription = feed.subscribe(stream_symbols())
+
+    def events():
+        try:
+            while not subscription.closed:
+                message = subscription.get(timeout=STREAM_HEARTBEAT)
+                if message is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                event, data = message
+                yield f"event: {event}\ndata: {data}\n\n"
+        finally:
+            feed.unsubscribe(subscription)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+if Sock is not None:
+    sock = Sock(app)
+
+    @sock.route('/ws')
+    def websocket(ws):
+        """Same feed as /api/stream, as {"event": ..., "data": ...} frames"""
+        subscription = feed.subscribe(stream_symbols())
+        try:
+            while not subscription.closed:
+                message = subscription.get(timeout=STREAM_HEARTBEAT)
+                if message is None:
+                    ws.send('{"event": "heartbeat"}')
+                    continue
+                event, data = message
+                ws.send(f'{{"event": "{event}", "data": {data}}}')
+        finally:
+            feed.unsubscribe(subscription)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trading bot with its HTTP API")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--production', action='store_true',
+                        help="Serve with waitress instead of the Flask development server")
+    parser.add_argument('--threads', type=int, default=64,
+                        help="Request threads in production mode; each open stream holds one")
+    args = parser.parse_args()
+
+    configure_logging()
+    start_engine()
+    if args.production:
+        from waitress import serve
+        serve(app, host=args.host, port=args.port, threads=args.threads)
+    else:
+        app.run(host=args.host, port=args.port, threaded=True)
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    main()
\ No newline at end of file
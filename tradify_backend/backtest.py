@@ -0,0 +1,279 @@
+# backtest.py
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from features import (build_feature_rows, compute_indicators, consecutive_candles,
+                      engulfing_pattern, pip_size_for)
+from levels import RESISTANCE, find_levels
+
+BAR_DTYPE = np.dtype([
+    ('time', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+])
+
+PAIR_LEGS = ('EURUSD', 'GBPUSD')  # every signal opens both, as in execute_trade
+CONTRACT_SIZE = 100000
+EXIT_PIP = 0.0001  # take-profit/stop-loss pips are real FX pips on both pairs
+
+
+def load_bars(path):
+    """Load OHLC bars from CSV or Parquet into a BAR_DTYPE array"""
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    df.columns = [c.strip().lower() for c in df.columns]
+
+    times = df['time']
+    if pd.api.types.is_numeric_dtype(times):
+        seconds = times.to_numpy(dtype=np.int64)
+    else:
+        seconds = pd.to_datetime(times).to_numpy().astype('datetime64[s]').astype(np.int64)
+
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars['time'] = seconds
+    for field in ('open', 'high', 'low', 'close'):
+        bars[field] = df[field].to_numpy(dtype=np.float64)
+    return bars[np.argsort(bars['time'], kind='stable')]
+
+
+def symbol_from_path(path):
+    """EURUSD from data/EURUSD_M1.csv"""
+    return os.path.basename(path).split('.')[0].split('_')[0].upper()
+
+
+def level_candidates(bars, symbol, lookback=100, proximity_pips=5, round_digits=None,
+                     chunk=20000):
+    """Every (bar, level) pair the live strategy would consider
+
+    The live bot looks at the last `lookback` bars, so a level found on
+    bar i is visible from bar i + 2 (its right neighbour has closed) to
+    bar i + lookback - 3. Returns bar indices, level rows and the candle
+    pattern arrays.
+    """
+    open_, close = bars['open'], bars['close']
+    engulfing = engulfing_pattern(open_, close)
+    consecutive = consecutive_candles(open_, close)
+    pattern = (engulfing != 0) | (consecutive != 0)
+
+    levels = find_levels(bars['time'].astype('datetime64[s]'), bars['low'],
+                         bars['high'], symbol, round_digits)
+    offsets = np.arange(2, lookback - 2)
+    tolerance = proximity_pips * pip_size_for(symbol)
+
+    bar_index, level_index = [], []
+    for start in range(0, len(levels), chunk):
+        block = levels[start:start + chunk]
+        t = (block['index'][:, None] + offsets).ravel()
+        li = np.repeat(np.arange(start, start + len(block)), len(offsets))
+        inside = t < len(bars)
+        t, li = t[inside], li[inside]
+        keep = pattern[t] & (np.abs(close[t] - levels['price'][li]) <= tolerance)
+        bar_index.append(t[keep])
+        level_index.append(li[keep])
+
+    bar_index = np.concatenate(bar_index) if bar_index else np.empty(0, np.int64)
+    level_index = np.concatenate(level_index) if level_index else np.empty(0, np.int64)
+    # Live ordering: per bar, levels in the order find_levels returns them
+    order = np.lexsort((level_index, bar_index))
+    return bar_index[order], levels[level_index[order]], engulfing, consecutive
+
+
+def score_candidates(bars, symbol, model=None, lookback=100, proximity_pips=5,
+                     round_digits=None, batch=200000):
+    """Candidates with their model confidence (1.0 everywhere without a model)"""
+    bar_index, levels, engulfing, consecutive = level_candidates(
+        bars, symbol, lookback, proximity_pips, round_digits)
+    if model is None or not len(bar_index):
+        return bar_index, levels, np.ones(len(bar_index), dtype=np.float32)
+
+    indicators = compute_indicators(bars['close'])
+    confidence = np.concatenate([
+        model.inplace_predict(build_feature_rows(
+            indicators, bars['close'], bar_index[s:s + batch],
+            levels['price'][s:s + batch], levels['type'][s:s + batch],
+            engulfing, consecutive, pip_size_for(symbol)))
+        for s in range(0, len(bar_index), batch)
+    ]).astype(np.float32)
+    return bar_index, levels, confidence
+
+
+def select_signals(symbol, bar_index, levels, confidence, ml_threshold=0.7):
+    """First accepted candidate per bar: (bar index, buy flag, confidence)"""
+    accepted = confidence >= ml_threshold
+    bar_index, levels, confidence = bar_index[accepted], levels[accepted], confidence[accepted]
+
+    # get_trading_signal acts on the first signal only
+    bar_index, first = np.unique(bar_index, return_index=True)
+    levels, confidence = levels[first], confidence[first]
+
+    # Same mapping as get_trading_signal + execute_trade: only a GBPUSD
+    # resistance signal ends up as 'buy'. EURUSD signals carry
+    # 'bullish'/'bearish', which execute_trade sends as sells.
+    buy = (levels['type'] == RESISTANCE) if 'GBPUSD' in symbol else np.zeros(len(levels), bool)
+    return bar_index, buy, confidence
+
+
+def simulate_exits(bars, entry_index, buy, take_profit_pips, stop_loss_pips,
+                   max_hold_bars, spread_pips, chunk=50000):
+    """Entry/exit prices for market orders filled at the next bar's open"""
+    n = len(bars)
+    entry_price = bars['open'][entry_index] + np.where(buy, 1, 0) * spread_pips * EXIT_PIP
+    tp = entry_price + np.where(buy, 1, -1) * take_profit_pips * EXIT_PIP
+    sl = entry_price - np.where(buy, 1, -1) * stop_loss_pips * EXIT_PIP
+
+    # Windows of future highs/lows, padded so every entry has max_hold_bars
+    pad = np.full(max_hold_bars, np.nan)
+    highs = np.lib.stride_tricks.sliding_window_view(np.concatenate([bars['high'], pad]), max_hold_bars)
+    lows = np.lib.stride_tricks.sliding_window_view(np.concatenate([bars['low'], pad]), max_hold_bars)
+
+    exit_index = np.empty(len(entry_index), dtype=np.int64)
+    exit_price = np.empty(len(entry_index))
+    for s in range(0, len(entry_index), chunk):
+        e, b = entry_index[s:s + chunk], buy[s:s + chunk]
+        h, l = highs[e], lows[e]
+        tp_hit = np.where(b[:, None], h >= tp[s:s + chunk, None], l <= tp[s:s + chunk, None])
+        sl_hit = np.where(b[:, None], l <= sl[s:s + chunk, None], h >= sl[s:s + chunk, None])
+        first_tp = np.where(tp_hit.any(1), tp_hit.argmax(1), max_hold_bars)
+        first_sl = np.where(sl_hit.any(1), sl_hit.argmax(1), max_hold_bars)
+
+        # The stop wins when both are touched inside the same bar
+        steps = np.minimum(first_tp, first_sl)
+        timeout = steps == max_hold_bars
+        idx = np.minimum(e + np.where(timeout, max_hold_bars - 1, steps), n - 1)
+        exit_index[s:s + chunk] = idx
+        exit_price[s:s + chunk] = np.where(
+            timeout, bars['close'][idx],
+            np.where(first_sl <= first_tp, sl[s:s + chunk], tp[s:s + chunk]))
+    return entry_price, exit_index, exit_price
+
+
+def summarize(pnl):
+    """Win rate, average win/loss and profit factor for a PnL array"""
+    wins, losses = pnl[pnl > 0], pnl[pnl < 0]
+    gross_win, gross_loss = wins.sum(), -losses.sum()
+    equity = np.cumsum(pnl)
+    drawdown = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:] - equity
+    return {
+        'trades': int(len(pnl)),
+        'win_rate': float(len(wins) / len(pnl)) if len(pnl) else 0.0,
+        'avg_win': float(wins.mean()) if len(wins) else 0.0,
+        'avg_loss': float(-losses.mean()) if len(losses) else 0.0,
+        # Undefined, not infinite, until there is a loss: inf is not valid JSON
+        'profit_factor': float(gross_win / gross_loss) if gross_loss else None if gross_win else 0.0,
+        'net_profit': float(pnl.sum()),
+        'max_drawdown': float(drawdown.max()) if len(pnl) else 0.0,
+    }
+
+
+def run_backtest(bars_by_symbol, model=None, ml_threshold=0.7, lot_size=0.1,
+                 lookback=100, proximity_pips=5, round_digits=None, take_profit_pips=20,
+                 stop_loss_pips=10, max_hold_bars=60, spread_pips=1.0, scored=None):
+    """Replay the live strategy over history; returns (trades, stats)
+
+    `scored` may hold score_candidates output per symbol, so runs that
+    only differ in ml_threshold or lot_size can skip the scoring.
+    """
+    # Signals per symbol, then the first one per timestamp across symbols,
+    # in watchlist order, like get_trading_signal's signals[0]
+    found = []
+    for rank, (symbol, bars) in enumerate(bars_by_symbol.items()):
+        if scored is not None:
+            candidates = scored[symbol]
+        else:
+            candidates = score_candidates(bars, symbol, model, lookback, proximity_pips,
+                                          round_digits)
+        index, buy, confidence = select_signals(symbol, *candidates, ml_threshold=ml_threshold)
+        found.append(pd.DataFrame({
+            'time': bars['time'][index], 'rank': rank, 'source': symbol,
+            'buy': buy, 'confidence': confidence,
+        }))
+    signals = pd.concat(found).sort_values(['time', 'rank'], kind='stable')
+    signals = signals.drop_duplicates('time').reset_index(drop=True)
+
+    legs = []
+    for leg in PAIR_LEGS:
+        bars = bars_by_symbol.get(leg)
+        if bars is None or not len(signals):
+            continue
+        # Orders go out at the close of the signal bar, filling at the next open
+        entry_index = np.searchsorted(bars['time'], signals['time'].to_numpy(), 'right')
+        valid = entry_index < len(bars)
+        entry_index = entry_index[valid]
+        buy = signals['buy'].to_numpy()[valid]
+        entry_price, exit_index, exit_price = simulate_exits(
+            bars, entry_index, buy, take_profit_pips, stop_loss_pips,
+            max_hold_bars, spread_pips)
+        side = np.where(buy, 1.0, -1.0)
+        legs.append(pd.DataFrame({
+            'signal_time': pd.to_datetime(signals['time'].to_numpy()[valid], unit='s'),
+            'source': signals['source'].to_numpy()[valid],
+            'symbol': leg,
+            'direction': np.where(buy, 'buy', 'sell'),
+            'confidence': signals['confidence'].to_numpy()[valid],
+            'entry_time': pd.to_datetime(bars['time'][entry_index], unit='s'),
+            'entry_price': entry_price,
+            'exit_time': pd.to_datetime(bars['time'][exit_index], unit='s'),
+            'exit_price': exit_price,
+            'pnl': (exit_price - entry_price) * side * CONTRACT_SIZE * lot_size,
+        }))
+
+    columns = ['signal_time', 'source', 'symbol', 'direction', 'confidence', 'entry_time',
+               'entry_price', 'exit_time', 'exit_price', 'pnl']
+    trades = pd.concat(legs, ignore_index=True) if legs else pd.DataFrame(columns=columns)
+    trades = trades.sort_values(['entry_time', 'symbol'], kind='stable').reset_index(drop=True)
+    return trades, summarize(trades['pnl'].to_numpy(dtype=np.float64))
+
+
+def format_stats(stats):
+    """Stats in the shape /api/stats returns to the dashboard"""
+    return {
+        'Win Rate': f"{stats['win_rate'] * 100:.0f}%",
+        'Avg Win': f"${stats['avg_win']:.0f}",
+        'Avg Loss': f"${stats['avg_loss']:.0f}",
+        'Profit Factor': (round(stats['profit_factor'], 2)
+                          if stats['profit_factor'] is not None else None),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the S/R + engulfing + XGBoost strategy")
+    parser.add_argument('paths', nargs='+', help="CSV/Parquet bar files named <SYMBOL>[_...].ext")
+    parser.add_argument('--model', default='xgboost_model.model')
+    parser.add_argument('--no-model', action='store_true', help="Skip the ML gate")
+    parser.add_argument('--ml-threshold', type=float, default=0.7)
+    parser.add_argument('--lot-size', type=float, default=0.1)
+    parser.add_argument('--take-profit', type=float, default=20, help="pips")
+    parser.add_argument('--stop-loss', type=float, default=10, help="pips")
+    parser.add_argument('--max-hold', type=int, default=60, help="bars")
+    parser.add_argument('--report', default='backtest_report.json')
+    parser.add_argument('--trades', help="Write individual trades to this CSV")
+    args = parser.parse_args()
+
+    bars_by_symbol = {symbol_from_path(p): load_bars(p) for p in args.paths}
+    model = None
+    if not args.no_model:
+        model = xgb.Booster()
+        model.load_model(args.model)
+
+    trades, stats = run_backtest(bars_by_symbol, model, args.ml_threshold, args.lot_size,
+                                 take_profit_pips=args.take_profit,
+                                 stop_loss_pips=args.stop_loss, max_hold_bars=args.max_hold)
+    print(json.dumps(stats, indent=2))
+
+    with open(args.report, 'w') as f:
+        json.dump({'stats': stats, 'symbols': list(bars_by_symbol)}, f, indent=2)
+    if args.trades:
+        trades.to_csv(args.trades, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# bar_store.py
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from metrics import FETCH
+from mt5_gateway import ENGINE, proxy
+
+logger = logging.getLogger(__name__)
+
+
+class BarSeries:
+    """Fixed-capacity ring of OHLC bars for one symbol and timeframe"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.data = None  # allocated on first fetch, using MT5's rate dtype
+        self.pos = 0  # next slot to write
+        self.count = 0
+        self.depth = 0  # bars requested on the last full fetch
+        self.last_update = 0.0
+
+    @property
+    def last_time(self):
+        """Open time (epoch seconds) of the newest stored bar"""
+        if not self.count:
+            return None
+        return int(self.data['time'][(self.pos - 1) % self.capacity])
+
+    def reset(self, rates, depth):
+        """Replace everything with a fresh block of rates"""
+        # Every slot is written twice, at i and i + capacity, so the newest
+        # n bars are always one contiguous slice and views need no copy
+        self.data = np.zeros(self.capacity * 2, dtype=rates.dtype)
+        self.pos = 0
+        self.count = 0
+        self.depth = depth
+        self.extend(rates)
+
+    def extend(self, rates):
+        """Merge bars fetched from the terminal; returns how many were new"""
+        last_time = self.last_time
+        if last_time is not None:
+            rates = rates[rates['time'] >= last_time]
+            if len(rates) and rates['time'][0] == last_time:
+                # The newest stored bar was still forming, overwrite it
+                slot = (self.pos - 1) % self.capacity
+                self.data[slot] = self.data[slot + self.capacity] = rates[0]
+                rates = rates[1:]
+
+        added = len(rates)
+        rates = rates[-self.capacity:]
+        slots = (self.pos + np.arange(len(rates))) % self.capacity
+        self.data[slots] = rates
+        self.data[slots + self.capacity] = rates
+        self.pos = (self.pos + len(rates)) % self.capacity
+        self.count = min(self.count + added, self.capacity)
+        return added
+
+    def view(self, count):
+        """Read-only view of the newest `count` bars, oldest first"""
+        count = min(count, self.count)
+        end = self.pos + self.capacity
+        window = self.data[end - count:end]
+        window.flags.writeable = False
+        return window
+
+
+class BarStore:
+    """Per-symbol, per-timeframe bar cache shared by the bot and the API
+
+    Only bars at or after the newest stored one are pulled from the
+    terminal on refresh. Views handed out by bars() alias the store: the
+    last row tracks the forming bar, and older rows stay intact for the
+    next capacity - count new bars.
+
+    Terminal pulls run at the caller's gateway priority: the engine's by
+    default, while dashboard readers pass DASHBOARD and a timeout so they
+    queue behind the strategy and give up rather than block it.
+    """
+
+    def __init__(self, capacity=5000, initial_count=100, refresh_interval=1.0):
+        self.capacity = capacity
+        self.initial_count = initial_count
+        self.refresh_interval = refresh_interval  # seconds between terminal pulls
+        self._series = {}
+        self._lock = threading.Lock()
+        self.listeners = []  # called as listener(symbol, timeframe) on bar close
+        self._terminals = {}  # (priority, timeout) -> gateway proxy
+        self._selected = set()  # symbols the terminal accepted
+
+    def _terminal(self, priority, timeout):
+        terminal = self._terminals.get((priority, timeout))
+        if terminal is None:
+            terminal = self._terminals[(priority, timeout)] = proxy(priority, timeout)
+        return terminal
+
+    def _get_series(self, symbol, timeframe, create=True):
+        """Series for a symbol; only created for symbols the terminal selected"""
+        key = (symbol, timeframe)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None and create and symbol in self._selected:
+                series = self._series[key] = BarSeries(self.capacity)
+            return series
+
+    def _select(self, mt5, symbol):
+        """Select a symbol in the terminal once; False if it does not exist"""
+        with self._lock:
+            if symbol in self._selected:
+                return True
+        if not mt5.symbol_select(symbol, True):
+            logger.warning("Symbol not found or could not be selected",
+                           extra={'symbol': symbol})
+            return False
+        with self._lock:
+            self._selected.add(symbol)
+        return True
+
+    def update(self, symbol, timeframe, count=None, force=False, priority=ENGINE, timeout=None):
+        """Pull new bars from the terminal; returns the number added
+
+        The series lock is only held to decide what to fetch and to merge
+        the result, never across the terminal call, so a dashboard pull
+        queued at low priority cannot hold up the engine's reads.
+        """
+        mt5 = self._terminal(priority, timeout)
+        # Unknown names never get a series, so arbitrary requests cannot
+        # grow the store
+        if not self._select(mt5, symbol):
+            return 0
+        series = self._get_series(symbol, timeframe)
+        count = min(max(count or 0, self.initial_count), self.capacity)
+
+        with series.lock:
+            now = time.monotonic()
+            if (not force and series.depth >= count
+                    and now - series.last_update < self.refresh_interval):
+                return 0
+            # Claim this refresh so concurrent readers serve the current view
+            series.last_update = now
+            full = series.depth < count
+            last_time = series.last_time
+
+        if full:
+            # First use, or a caller wants more history than we hold
+            with FETCH.time(kind='full'):
+                rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
+            if rates is None or len(rates) == 0:
+                logger.warning("No rates data returned", extra={'symbol': symbol})
+                return 0
+        else:
+            since = datetime.fromtimestamp(last_time, tz=timezone.utc)
+            # Bar times are in server time, which runs ahead of UTC, so
+            # leave the upper bound open
+            until = datetime.now(timezone.utc) + timedelta(days=1)
+            with FETCH.time(kind='range'):
+                rates = mt5.copy_rates_range(symbol, timeframe, since, until)
+            if rates is None or len(rates) == 0:
+                return 0
+
+        with series.lock:
+            if full and series.depth < count:
+                series.reset(rates, count)
+                return len(rates)
+            # Another caller may have merged newer bars meanwhile; extend()
+            # only keeps what is at or after the newest stored bar
+            added = series.extend(rates)
+
+        if added:
+            # A newer bar appearing means the one before it has closed
+            for listener in self.listeners:
+                listener(symbol, timeframe)
+        return added
+
+    def last_time(self, symbol, timeframe):
+        """Open time of the newest stored bar, without touching the terminal"""
+        series = self._get_series(symbol, timeframe, create=False)
+        if series is None:
+            return None
+        with series.lock:
+            return series.last_time
+
+    def bars(self, symbol, timeframe, count=100, priority=ENGINE, timeout=None):
+        """Zero-copy structured array of the newest bars for a symbol"""
+        self.update(symbol, timeframe, count, priority=priority, timeout=timeout)
+        series = self._get_series(symbol, timeframe, create=False)
+        if series is None:
+            return None
+        with series.lock:
+            if not series.count:
+                return None
+            return series.view(count)
+
+    def frame(self, symbol, timeframe, count=100):
+        """Newest bars as a DataFrame with parsed times"""
+        bars = self.bars(symbol, timeframe, count)
+        if bars is None:
+            return pd.DataFrame()
+        df = pd.DataFrame(bars)
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        return df
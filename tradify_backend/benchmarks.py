@@ -0,0 +1,316 @@
+# benchmarks.py
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+import zlib
+from datetime import datetime
+
+# The strategy's per-row helpers live on the bot, whose module needs a
+# broker; the simulated one needs no terminal
+os.environ.setdefault('TRADIFY_BROKER', 'sim:?bars=2000')
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from backtest import BAR_DTYPE, load_bars, symbol_from_path
+from features import (FEATURE_NAMES, build_feature_rows, compute_indicators, consecutive_candles,
+                      engulfing_pattern, pip_size_for)
+from indicators import IncrementalIndicators
+from levels import find_levels, identify_levels, identify_levels_loop, synthetic_bars
+from serialization import encode_chart, encode_json
+from sim_broker import Tick, TradePosition
+from stream import position_row
+from trading_bot import ForexTradingBot
+
+SIZES = (100, 1000, 10000, 100000, 1000000)
+SYMBOL_COUNTS = (1, 5, 10, 50)
+POSITION_COUNTS = (1, 10, 100, 1000)
+LOOKBACKS = (100, 1000)  # bars per symbol in the multi-symbol signal pass
+LEGACY_LIMIT = 10000  # largest input for the original per-row code paths
+
+
+def measure(fn, items, min_time=0.2, max_repeats=1000):
+    """Median time per call and peak traced memory of one call"""
+    fn()  # warm caches and lazy allocations
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < 3 or (time.perf_counter() < deadline and len(times) < max_repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    # Separate run: tracing slows allocation-heavy code down
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = statistics.median(times)
+    return {'ms': seconds * 1000, 'itemsPerSecond': items / seconds,
+            'peakKb': peak / 1024, 'repeats': len(times)}
+
+
+class BarSource:
+    """Bars per symbol, from history files or synthetic"""
+
+    def __init__(self, history=None):
+        self.recorded = {}
+        if history:
+            from training import history_files
+            for path in history_files(history):
+                if '_ticks' not in path:
+                    self.recorded[symbol_from_path(path)] = load_bars(path)
+        self._synthetic = {}
+
+    def symbols(self, count):
+        names = list(self.recorded) or ['EURUSD', 'GBPUSD']
+        return [names[i % len(names)] + ('' if i < len(names) else f'.{i}') for i in range(count)]
+
+    def bars(self, symbol, count):
+        """The newest `count` bars, or None if the recording is shorter"""
+        base = symbol.split('.')[0]
+        if base in self.recorded:
+            bars = self.recorded[base]
+            return bars[-count:] if len(bars) >= count else None
+        cached = self._synthetic.get(symbol)
+        if cached is None or len(cached) < count:
+            df = synthetic_bars(base, count, seed=zlib.crc32(symbol.encode()))
+            cached = np.empty(count, dtype=BAR_DTYPE)
+            cached['time'] = df['time'].to_numpy().astype('datetime64[s]').astype(np.int64)
+            for field in ('open', 'high', 'low', 'close'):
+                cached[field] = df[field].to_numpy()
+            self._synthetic[symbol] = cached
+        return cached[-count:]
+
+    def frame(self, symbol, count):
+        """Bars as the DataFrame the bot's df-based paths take"""
+        bars = self.bars(symbol, count)
+        if bars is None:
+            return None
+        df = pd.DataFrame(bars)
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        df['symbol'] = symbol.split('.')[0]
+        return df
+
+
+def load_model(path='xgboost_model.model'):
+    if os.path.exists(path):
+        model = xgb.Booster()
+        model.load_model(path)
+        return model
+    rng = np.random.default_rng(0)
+    data = xgb.DMatrix(rng.random((1000, len(FEATURE_NAMES))), label=rng.integers(0, 2, 1000))
+    return xgb.train({'objective': 'binary:logistic', 'max_depth': 5}, data, 100)
+
+
+def bench_levels(source, sizes, legacy_limit):
+    for size in sizes:
+        df = source.frame('EURUSD', size)
+        if df is None:
+            continue
+        yield 'levels', 'vectorized', size, 1, measure(lambda: identify_levels(df), size)
+        if size <= legacy_limit:
+            yield 'levels', 'loop', size, 1, measure(lambda: identify_levels_loop(df), size)
+
+
+def bench_patterns(source, sizes, legacy_limit):
+    for size in sizes:
+        df = source.frame('EURUSD', size)
+        if df is None:
+            continue
+        open_, close = df['open'].to_numpy(), df['close'].to_numpy()
+        yield 'patterns', 'vectorized', size, 1, measure(
+            lambda: (engulfing_pattern(open_, close), consecutive_candles(open_, close)), size)
+        if size <= legacy_limit:
+            def per_bar():
+                for i in range(size):
+                    ForexTradingBot.check_engulfing_pattern(None, df, i)
+                    ForexTradingBot.check_consecutive_candles(None, df, i, 'bullish')
+                    ForexTradingBot.check_consecutive_candles(None, df, i, 'bearish')
+            yield 'patterns', 'iloc', size, 1, measure(per_bar, size)
+
+
+def bench_features(source, sizes, legacy_limit):
+    for size in sizes:
+        bars = source.bars('EURUSD', size)
+        if bars is None:
+            continue
+        close, open_ = bars['close'], bars['open']
+        levels = find_levels(bars['time'].astype('datetime64[s]'), bars['low'], bars['high'],
+                             'EURUSD')
+        last = size - 1
+
+        def full():
+            # What generate_features computed before indicators went incremental
+            return build_feature_rows(compute_indicators(close), close, np.full(len(levels), last),
+                                      levels['price'], levels['type'],
+                                      engulfing_pattern(open_, close),
+                                      consecutive_candles(open_, close), pip_size_for('EURUSD'))
+        yield 'features', 'full_recompute', size, 1, measure(full, max(len(levels), 1))
+
+        if size <= legacy_limit:
+            # Per-bar cost of the running indicators the live bot keeps
+            def incremental():
+                engine = IncrementalIndicators()
+                for value in close:
+                    engine.update(value)
+            yield 'features', 'incremental_per_bar', size, 1, measure(incremental, size)
+
+
+def bench_prediction(model, symbol_counts):
+    row = np.random.default_rng(0).random((1, len(FEATURE_NAMES))).astype(np.float32)
+    yield 'prediction', 'dmatrix_single', 1, 1, measure(
+        lambda: model.predict(xgb.DMatrix(row)), 1)
+    yield 'prediction', 'inplace_single', 1, 1, measure(lambda: model.inplace_predict(row), 1)
+    for count in symbol_counts:
+        rows = np.repeat(row, count * 4, axis=0)  # a few candidate levels per symbol
+        yield 'prediction', 'inplace_batch', len(rows), count, measure(
+            lambda: model.inplace_predict(rows), len(rows))
+
+
+def bench_signal_pass(source, model, symbol_counts, lookbacks):
+    """Levels, patterns, features and one batched predict across symbols"""
+    for lookback in lookbacks:
+        for count in symbol_counts:
+            symbols = source.symbols(count)
+            data = [(s, source.bars(s, lookback)) for s in symbols]
+            if any(bars is None for _, bars in data):
+                continue
+
+            def signal_pass():
+                rows = []
+                for symbol, bars in data:
+                    open_, close = bars['open'], bars['close']
+                    levels = find_levels(bars['time'].astype('datetime64[s]'), bars['low'],
+                                         bars['high'], symbol.split('.')[0])
+                    if not len(levels):
+                        continue
+                    last = len(close) - 1
+                    rows.append(build_feature_rows(
+                        compute_indicators(close), close, np.full(len(levels), last),
+                        levels['price'], levels['type'], engulfing_pattern(open_, close),
+                        consecutive_candles(open_, close), pip_size_for(symbol.split('.')[0])))
+                if rows:
+                    model.inplace_predict(np.vstack(rows))
+            yield 'signal_pass', f'lookback_{lookback}', lookback, count, measure(signal_pass, count)
+
+
+def bench_chart_json(source, sizes, legacy_limit):
+    for size in sizes:
+        bars = source.bars('EURUSD', size)
+        if bars is None:
+            continue
+        for fmt in ('rows', 'columns', 'binary'):
+            yield 'chart_json', fmt, size, 1, measure(lambda: encode_chart(bars, fmt), size)
+        if size <= legacy_limit:
+            df = source.frame('EURUSD', size)
+
+            def iterrows():
+                rows = [{'time': row['time'].isoformat(), 'open': row['open'], 'high': row['high'],
+                         'low': row['low'], 'close': row['close']} for _, row in df.iterrows()]
+                return json.dumps(rows)
+            yield 'chart_json', 'iterrows', size, 1, measure(iterrows, size)
+
+
+def bench_trades_json(position_counts):
+    tick = Tick(0, 1.1, 1.1001, 0.0, 0, 0, 0, 0.0)
+    for count in position_counts:
+        positions = [TradePosition(i, 0, i % 2, 123456, 0.1, 1.09, 1.1, 10.0, 'EURUSD', '')
+                     for i in range(count)]
+
+        def trades():
+            return encode_json({'message': 'Trades fetched successfully', 'statusCode': 200,
+                                'data': [position_row(pos, tick) for pos in positions]})
+        yield 'trades_json', 'rows', count, 1, measure(trades, count)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print time ratios against an earlier results file (>1 means slower now)"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    key = lambda r: (r['case'], r['variant'], r['size'], r['symbols'])
+    before = {key(r): r for r in baseline['results']}
+    print(f"\nCompared with {baseline.get('revision')} ({baseline_path}):")
+    for result in results:
+        old = before.get(key(result))
+        if old:
+            ratio = result['ms'] / old['ms']
+            flag = '  <-- slower' if ratio > 1.2 else ''
+            print(f"  {result['case']:12} {result['variant']:20} size={result['size']:<8} "
+                  f"symbols={result['symbols']:<3} {ratio:6.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the strategy hot paths and API payloads")
+    parser.add_argument('--history', help="Use recorded bars from this directory")
+    parser.add_argument('--quick', action='store_true', help="Sizes up to 10k bars and 10 symbols")
+    parser.add_argument('--cases', help="Comma-separated subset, e.g. levels,chart_json")
+    parser.add_argument('--legacy-limit', type=int, default=LEGACY_LIMIT,
+                        help="Largest input for the original per-row implementations")
+    parser.add_argument('--out-dir', default='benchmark_results')
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = [s for s in SIZES if not args.quick or s <= 10000]
+    symbol_counts = [c for c in SYMBOL_COUNTS if not args.quick or c <= 10]
+    source = BarSource(args.history)
+    model = load_model()
+
+    cases = {
+        'levels': lambda: bench_levels(source, sizes, args.legacy_limit),
+        'patterns': lambda: bench_patterns(source, sizes, args.legacy_limit),
+        'features': lambda: bench_features(source, sizes, args.legacy_limit),
+        'prediction': lambda: bench_prediction(model, symbol_counts),
+        'signal_pass': lambda: bench_signal_pass(source, model, symbol_counts, LOOKBACKS),
+        'chart_json': lambda: bench_chart_json(source, sizes, args.legacy_limit),
+        'trades_json': lambda: bench_trades_json(POSITION_COUNTS),
+    }
+    selected = args.cases.split(',') if args.cases else list(cases)
+
+    results = []
+    for name in selected:
+        for case, variant, size, symbols, stats in cases[name]():
+            result = dict(case=case, variant=variant, size=size, symbols=symbols, **stats)
+            results.append(result)
+            print(f"{case:12} {variant:20} size={size:<8} symbols={symbols:<3} "
+                  f"{stats['ms']:10.3f} ms {stats['itemsPerSecond']:14,.0f}/s "
+                  f"{stats['peakKb']:10,.0f} KB peak")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    revision = git_revision()
+    path = os.path.join(args.out_dir,
+                        f"{datetime.now():%Y%m%d-%H%M%S}-{revision or 'unknown'}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            'revision': revision,
+            'created': datetime.now().isoformat(),
+            'data': args.history or 'synthetic',
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'xgboost': xgb.__version__,
+            'results': results,
+        }, f, indent=2)
+    print(f"Saved {len(results)} results to {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# cache.py
+import threading
+import time
+from collections import defaultdict
+
+
+class _Entry:
+    def __init__(self):
+        self.value = None
+        self.error = None
+        self.expires = 0.0
+        self.stale = False  # invalidated while still computing
+        self.ready = threading.Event()
+
+
+class ResponseCache:
+    """TTL cache for endpoint payloads with request coalescing
+
+    Keys are tuples whose first item names the endpoint; counters are
+    kept per endpoint. While a value is being computed, other callers
+    asking for the same key wait for it instead of calling upstream.
+    Expired entries are swept out every `prune_interval` seconds, so keys
+    that are never asked for again do not pile up.
+    """
+
+    def __init__(self, ttls=None, default_ttl=1.0, prune_interval=10.0):
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'coalesced': 0})
+
+    def get_or_compute(self, key, compute, ttl=None):
+        """Return the cached value for key, computing it at most once at a time"""
+        endpoint = key[0]
+        ttl = self.ttls.get(endpoint, self.default_ttl) if ttl is None else ttl
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not entry.ready.is_set():
+                    self._stats[endpoint]['coalesced'] += 1
+                    waiting = True
+                elif entry.error is None and time.monotonic() < entry.expires:
+                    self._stats[endpoint]['hits'] += 1
+                    return entry.value
+                else:
+                    entry = None
+            if entry is None:
+                now = time.monotonic()
+                if now >= self._next_prune:
+                    self._prune(now)
+                self._stats[endpoint]['misses'] += 1
+                entry = self._entries[key] = _Entry()
+                waiting = False
+
+        if waiting:
+            entry.ready.wait()
+            if entry.error is not None:
+                raise entry.error
+            return entry.value
+
+        try:
+            entry.value = compute()
+            if not entry.stale:
+                entry.expires = time.monotonic() + ttl
+        except Exception as e:
+            entry.error = e
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+        finally:
+            entry.ready.set()
+        return entry.value
+
+    def _prune(self, now):
+        """Drop finished entries past their expiry (caller holds _lock)"""
+        for key in [k for k, e in self._entries.items() if e.ready.is_set() and e.expires <= now]:
+            del self._entries[key]
+        self._next_prune = now + self.prune_interval
+
+    def invalidate(self, *prefix):
+        """Drop every entry whose key starts with prefix"""
+        with self._lock:
+            for key in [k for k in self._entries if k[:len(prefix)] == prefix]:
+                entry = self._entries[key]
+                if entry.ready.is_set():
+                    del self._entries[key]
+                else:
+                    # Let current waiters have the value, but don't keep it
+                    entry.stale = True
+
+    def stats(self):
+        """Hit/miss/coalesced counters per endpoint"""
+        with self._lock:
+            stats = {}
+            for endpoint, counts in self._stats.items():
+                lookups = counts['hits'] + counts['misses'] + counts['coalesced']
+                stats[endpoint] = dict(counts, hitRate=(
+                    (counts['hits'] + counts['coalesced']) / lookups if lookups else 0.0))
+            return stats
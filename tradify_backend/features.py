@@ -0,0 +1,152 @@
+# features.py
+import numpy as np
+
+from levels import RESISTANCE
+
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+SMA_PERIODS = (50, 200)
+
+# Column order of every feature row handed to the XGBoost model
+FEATURE_NAMES = (
+    'rsi',
+    'macd',
+    'macd_signal',
+    'macd_hist',
+    'close_sma_50',
+    'close_sma_200',
+    'level_distance',
+    'level_type',
+    'engulfing',
+    'consecutive',
+)
+
+
+def pip_size_for(symbol):
+    """Pip size used for the proximity band and distance features"""
+    return 0.0001 if 'GBPUSD' not in symbol else 0.001
+
+
+def ema_step(prev, value, alpha):
+    """One exponential smoothing step, shared by every EMA-style average"""
+    return prev + alpha * (value - prev)
+
+
+def sma(values, period):
+    """Simple moving average, NaN until the window is full"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    # Differences of one running total, so an incremental update that keeps
+    # the same total reproduces these numbers exactly
+    totals = np.cumsum(values)
+    out[period - 1] = totals[period - 1] / period
+    out[period:] = (totals[period:] - totals[:-period]) / period
+    return out
+
+
+def ema(values, period, alpha=None):
+    """EMA seeded with the SMA of its first full window"""
+    values = np.asarray(values, dtype=np.float64)
+    alpha = 2.0 / (period + 1) if alpha is None else alpha
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    prev = float(np.mean(values[:period]))
+    out[period - 1] = prev
+    for i, value in enumerate(values[period:].tolist(), start=period):
+        prev = ema_step(prev, value, alpha)
+        out[i] = prev
+    return out
+
+
+def rsi(close, period=RSI_PERIOD):
+    """Wilder RSI, first value at bar `period`"""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return out
+    change = np.diff(close)
+    avg_gain = ema(np.maximum(change, 0.0), period, alpha=1.0 / period)
+    avg_loss = ema(np.maximum(-change, 0.0), period, alpha=1.0 / period)
+    total = avg_gain + avg_loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(total == 0, 0.0, 100.0 * avg_gain / total)
+    out[1:] = values
+    return out
+
+
+def macd(close, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL):
+    """MACD line, signal line and histogram"""
+    close = np.asarray(close, dtype=np.float64)
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = np.full(len(close), np.nan)
+    valid = np.flatnonzero(~np.isnan(line))
+    if len(valid):
+        signal_line[valid[0]:] = ema(line[valid[0]:], signal)
+    return line, signal_line, line - signal_line
+
+
+def compute_indicators(close):
+    """Full recompute of every indicator the model uses"""
+    line, signal_line, hist = macd(close)
+    indicators = {
+        'rsi': rsi(close),
+        'macd': line,
+        'macd_signal': signal_line,
+        'macd_hist': hist,
+    }
+    for period in SMA_PERIODS:
+        indicators[f'sma_{period}'] = sma(close, period)
+    return indicators
+
+
+def engulfing_pattern(open_, close):
+    """+1 bullish / -1 bearish engulfing for each bar, 0 otherwise"""
+    open_ = np.asarray(open_, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    out = np.zeros(len(close), dtype=np.int8)
+    if len(close) < 2:
+        return out
+    po, pc, co, cc = open_[:-1], close[:-1], open_[1:], close[1:]
+    bullish = (cc > co) & (pc < po) & (co < pc) & (cc > po)
+    bearish = (cc < co) & (pc > po) & (co > pc) & (cc < po)
+    out[1:] = bullish.astype(np.int8) - bearish.astype(np.int8)
+    return out
+
+
+def consecutive_candles(open_, close):
+    """+1 when a bar and the one before are both up, -1 when both down"""
+    open_ = np.asarray(open_, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    out = np.zeros(len(close), dtype=np.int8)
+    if len(close) < 2:
+        return out
+    up = close > open_
+    down = close < open_
+    out[1:] = (up[1:] & up[:-1]).astype(np.int8) - (down[1:] & down[:-1]).astype(np.int8)
+    return out
+
+
+def build_feature_rows(indicators, close, bar_index, level_prices, level_types,
+                       engulfing, consecutive, pip_size):
+    """Feature matrix with one row per (bar, level) candidate"""
+    bar_index = np.asarray(bar_index, dtype=np.int64)
+    level_prices = np.asarray(level_prices, dtype=np.float64)
+    price = np.asarray(close, dtype=np.float64)[bar_index]
+
+    rows = np.empty((len(bar_index), len(FEATURE_NAMES)), dtype=np.float32)
+    rows[:, 0] = indicators['rsi'][bar_index]
+    rows[:, 1] = indicators['macd'][bar_index]
+    rows[:, 2] = indicators['macd_signal'][bar_index]
+    rows[:, 3] = indicators['macd_hist'][bar_index]
+    rows[:, 4] = (price - indicators['sma_50'][bar_index]) / pip_size
+    rows[:, 5] = (price - indicators['sma_200'][bar_index]) / pip_size
+    rows[:, 6] = (price - level_prices) / pip_size
+    rows[:, 7] = np.asarray(level_types) == RESISTANCE
+    rows[:, 8] = np.asarray(engulfing)[bar_index]
+    rows[:, 9] = np.asarray(consecutive)[bar_index]
+    return rows
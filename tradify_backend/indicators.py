@@ -0,0 +1,174 @@
+# indicators.py
+import math
+from collections import deque
+
+import numpy as np
+
+from features import (MACD_FAST, MACD_SIGNAL, MACD_SLOW, RSI_PERIOD, SMA_PERIODS,
+                      compute_indicators, ema_step)
+
+NAN = float('nan')
+
+
+class RunningEMA:
+    """EMA seeded with the SMA of its first window, as features.ema does"""
+
+    def __init__(self, period, alpha=None):
+        self.period = period
+        self.alpha = 2.0 / (period + 1) if alpha is None else alpha
+        self.seed = []
+        self.value = NAN
+
+    def next_value(self, x):
+        """Value after x without changing state"""
+        if self.seed is None:
+            return ema_step(self.value, x, self.alpha)
+        if len(self.seed) + 1 < self.period:
+            return NAN
+        return float(np.mean(self.seed + [x]))
+
+    def update(self, x):
+        self.value = self.next_value(x)
+        if self.seed is not None:
+            self.seed.append(x)
+            if len(self.seed) == self.period:
+                self.seed = None
+        return self.value
+
+
+class RunningSMA:
+    """SMA from one running total, matching the cumsum in features.sma"""
+
+    def __init__(self, period):
+        self.period = period
+        self.total = 0.0
+        self.count = 0
+        self.totals = deque(maxlen=period)  # totals of the previous `period` bars
+
+    def next_value(self, x):
+        total = self.total + x
+        if self.count + 1 < self.period:
+            return NAN
+        if self.count + 1 == self.period:
+            return total / self.period
+        return (total - self.totals[0]) / self.period
+
+    def update(self, x):
+        value = self.next_value(x)
+        self.totals.append(self.total + x)
+        self.total += x
+        self.count += 1
+        return value
+
+
+class IncrementalIndicators:
+    """O(1)-per-bar RSI, MACD and SMAs with the same numbers as a full recompute
+
+    Bars are fed in time order with update(); preview() evaluates a bar
+    that is still forming without committing it.
+    """
+
+    def __init__(self, rsi_period=RSI_PERIOD, macd_fast=MACD_FAST, macd_slow=MACD_SLOW,
+                 macd_signal=MACD_SIGNAL, sma_periods=SMA_PERIODS):
+        self.gain = RunningEMA(rsi_period, alpha=1.0 / rsi_period)
+        self.loss = RunningEMA(rsi_period, alpha=1.0 / rsi_period)
+        self.fast = RunningEMA(macd_fast)
+        self.slow = RunningEMA(macd_slow)
+        self.signal = RunningEMA(macd_signal)
+        self.smas = {period: RunningSMA(period) for period in sma_periods}
+        self.prev_close = None
+        self.last_time = None
+        self.latest = None
+
+    def _step(self, close, commit):
+        step = 'update' if commit else 'next_value'
+        values = {}
+
+        if self.prev_close is None:
+            values['rsi'] = NAN
+        else:
+            change = close - self.prev_close
+            avg_gain = getattr(self.gain, step)(max(change, 0.0))
+            avg_loss = getattr(self.loss, step)(max(-change, 0.0))
+            total = avg_gain + avg_loss
+            values['rsi'] = 0.0 if total == 0 else 100.0 * avg_gain / total
+
+        line = getattr(self.fast, step)(close) - getattr(self.slow, step)(close)
+        # The signal EMA only starts once the MACD line exists
+        signal = getattr(self.signal, step)(line) if not math.isnan(line) else NAN
+        values['macd'] = line
+        values['macd_signal'] = signal
+        values['macd_hist'] = line - signal
+
+        for period, sma in self.smas.items():
+            values[f'sma_{period}'] = getattr(sma, step)(close)
+
+        if commit:
+            self.prev_close = close
+            self.latest = values
+        return values
+
+    def update(self, close, bar_time=None):
+        """Feed one closed bar and return its indicator values"""
+        if bar_time is not None:
+            self.last_time = bar_time
+        return self._step(float(close), commit=True)
+
+    def preview(self, close):
+        """Indicator values if `close` were the next bar, state untouched"""
+        return self._step(float(close), commit=False)
+
+    def warm_up(self, closes, times=None):
+        """Feed a block of history"""
+        times = [None] * len(closes) if times is None else np.asarray(times).tolist()
+        for close, bar_time in zip(np.asarray(closes, dtype=np.float64).tolist(), times):
+            self.update(close, bar_time)
+        return self.latest
+
+    def covers(self, times):
+        """True if bars from times[0] onwards can be applied without a gap"""
+        return self.last_time is not None and len(times) and self.last_time >= times[0]
+
+    def sync(self, times, closes):
+        """Feed only the bars newer than the last one seen"""
+        times = np.asarray(times)
+        start = 0 if self.last_time is None else np.searchsorted(times, self.last_time, 'right')
+        if start < len(times):
+            self.warm_up(np.asarray(closes)[start:], times[start:])
+        return self.latest
+
+
+def snapshot(values):
+    """Wrap one bar's values as 1-element arrays for build_feature_rows"""
+    return {name: np.array([value]) for name, value in values.items()}
+
+
+def verify(count=5000, seed=0):
+    """Check incremental values bar-for-bar against compute_indicators"""
+    rng = np.random.default_rng(seed)
+    close = np.round(1.1 + np.cumsum(rng.normal(0, 0.0002, count)), 5)
+    expected = compute_indicators(close)
+
+    engine = IncrementalIndicators()
+    engine.warm_up(close[:count // 2])
+    for i in range(count // 2, count):
+        preview = engine.preview(close[i])
+        values = engine.update(close[i])
+        for name, column in expected.items():
+            want = column[i]
+            for got in (preview[name], values[name]):
+                if not (got == want or (math.isnan(got) and math.isnan(want))):
+                    raise AssertionError(f"{name} differs at bar {i}: {got!r} != {want!r}")
+
+    # Every bar of a cold engine must match too, including the NaN warm-up
+    engine = IncrementalIndicators()
+    rows = [engine.update(x) for x in close[:300]]
+    for name, column in expected.items():
+        got = np.array([row[name] for row in rows])
+        if not np.array_equal(got, column[:300], equal_nan=True):
+            raise AssertionError(f"{name} differs during warm-up")
+    print(f"Incremental indicators match the full recompute over {count} bars")
+
+
+if __name__ == "__main__":
+    verify()
@@ -0,0 +1,295 @@
+# journal.py
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from backtest import CONTRACT_SIZE
+
+logger = logging.getLogger(__name__)
+
+TRADE_RETCODE_DONE = 10009  # MetaTrader5.TRADE_RETCODE_DONE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    time REAL NOT NULL,
+    action TEXT NOT NULL,
+    symbol TEXT,              -- the symbol whose level fired
+    direction TEXT,
+    confidence REAL,
+    level_price REAL,
+    level_type TEXT,
+    reason TEXT,
+    model_version TEXT
+);
+CREATE INDEX IF NOT EXISTS signals_symbol_time ON signals (symbol, time);
+CREATE INDEX IF NOT EXISTS signals_time ON signals (time);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY,
+    signal_id INTEGER REFERENCES signals (id),
+    time REAL NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    volume REAL NOT NULL,
+    position INTEGER,         -- the position closed, NULL for opens
+    requested_price REAL,
+    fill_price REAL,
+    retcode INTEGER,
+    comment TEXT,
+    ticket INTEGER,
+    attempts INTEGER,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS orders_symbol_time ON orders (symbol, time);
+CREATE INDEX IF NOT EXISTS orders_time ON orders (time);
+
+CREATE TABLE IF NOT EXISTS trades (
+    ticket INTEGER PRIMARY KEY,
+    signal_id INTEGER REFERENCES signals (id),
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    volume REAL NOT NULL,
+    open_time REAL NOT NULL,
+    open_price REAL NOT NULL,
+    close_time REAL,
+    close_price REAL,
+    profit REAL
+);
+CREATE INDEX IF NOT EXISTS trades_symbol_close ON trades (symbol, close_time);
+CREATE INDEX IF NOT EXISTS trades_close ON trades (close_time);
+
+-- Running totals per symbol, updated in the same transaction as each close
+CREATE TABLE IF NOT EXISTS aggregates (
+    symbol TEXT PRIMARY KEY,
+    trades INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    gross_win REAL NOT NULL,
+    gross_loss REAL NOT NULL
+);
+"""
+
+
+def empty_totals():
+    return {'trades': 0, 'wins': 0, 'losses': 0, 'gross_win': 0.0, 'gross_loss': 0.0}
+
+
+def summarize_totals(totals):
+    """Running totals in the shape of backtest.summarize()"""
+    trades, wins, losses = totals['trades'], totals['wins'], totals['losses']
+    gross_win, gross_loss = totals['gross_win'], totals['gross_loss']
+    return {
+        'trades': trades,
+        'win_rate': wins / trades if trades else 0.0,
+        'avg_win': gross_win / wins if wins else 0.0,
+        'avg_loss': gross_loss / losses if losses else 0.0,
+        'profit_factor': gross_win / gross_loss if gross_loss else None if gross_win else 0.0,
+        'net_profit': gross_win - gross_loss,
+    }
+
+
+class TradeJournal:
+    """SQLite record of every signal, order, fill and closed trade
+
+    Writes go through a queue to one writer thread, so the trading path
+    pays for a queue put rather than a disk sync. Win/loss totals are
+    kept in memory as well as in the aggregates table, which makes
+    stats() constant time however long the history grows. Reads open
+    their own connection; WAL mode lets them run beside the writer.
+    """
+
+    def __init__(self, path='trade_journal.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = sqlite3.connect(path, check_same_thread=False)
+        self._writer.execute('PRAGMA journal_mode=WAL')
+        self._writer.execute('PRAGMA synchronous=NORMAL')
+        self._writer.executescript(SCHEMA)
+
+        # Ids are handed out here so callers need not wait for the insert
+        self._next_signal_id = self._max_id('signals') + 1
+        self._next_order_id = self._max_id('orders') + 1
+        self._totals = {row[0]: dict(zip(empty_totals(), row[1:])) for row in self._writer.execute(
+            'SELECT symbol, trades, wins, losses, gross_win, gross_loss FROM aggregates')}
+        self._open = {row[0]: dict(zip(('signal_id', 'symbol', 'side', 'volume', 'open_price'),
+                                       row[1:]))
+                      for row in self._writer.execute(
+                          'SELECT ticket, signal_id, symbol, side, volume, open_price '
+                          'FROM trades WHERE close_time IS NULL')}
+
+        self._thread = threading.Thread(target=self._run, name='trade-journal', daemon=True)
+        self._thread.start()
+
+    def _max_id(self, table):
+        return self._writer.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}').fetchone()[0]
+
+    def _run(self):
+        while True:
+            statements = self._queue.get()
+            if statements is None:
+                self._queue.task_done()
+                return
+            try:
+                with self._writer:  # one transaction per batch
+                    for sql, params in statements:
+                        self._writer.execute(sql, params)
+            except sqlite3.Error:
+                logger.exception("Trade journal write failed", extra={'path': self.path})
+            finally:
+                self._queue.task_done()
+
+    def _write(self, *statements):
+        self._queue.put(statements)
+
+    # -- recording ---------------------------------------------------------
+
+    def record_signal(self, signal, model_version=None, now=None):
+        """Journal a signal from get_trading_signal; returns its id"""
+        trigger = signal.get('trigger') or {}
+        level = trigger.get('level') or {}
+        with self._lock:
+            signal_id = self._next_signal_id
+            self._next_signal_id += 1
+        self._write(('INSERT INTO signals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+            signal_id, now or time.time(), signal['action'], trigger.get('symbol'),
+            signal.get('direction'), _float(trigger.get('confidence')), _float(level.get('price')),
+            level.get('type'), signal.get('reason'), model_version)))
+        return signal_id
+
+    def record_order(self, outcome, side, signal_id=None, now=None):
+        """Journal an OrderDispatcher outcome; fills open or close a trade"""
+        request, result = outcome['request'], outcome['result']
+        now = now or time.time()
+        position = request.get('position')
+        filled = result is not None and result.retcode == TRADE_RETCODE_DONE
+        with self._lock:
+            order_id = self._next_order_id
+            self._next_order_id += 1
+        statements = [('INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+            order_id, signal_id, now, request['symbol'], side, request['volume'], position,
+            request.get('price'), result.price if filled else None,
+            result.retcode if result is not None else None,
+            result.comment if result is not None else None,
+            result.order if result is not None else None,
+            outcome['attempts'], outcome['latency_ms']))]
+
+        if filled and not position:
+            with self._lock:
+                self._open[result.order] = {'signal_id': signal_id, 'symbol': request['symbol'],
+                                            'side': side, 'volume': request['volume'],
+                                            'open_price': result.price}
+            statements.append((
+                'INSERT OR REPLACE INTO trades (ticket, signal_id, symbol, side, volume, '
+                'open_time, open_price) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (result.order, signal_id, request['symbol'], side, request['volume'], now,
+                 result.price)))
+        elif filled:
+            statements.extend(self._close(position, result.price, now))
+        self._write(*statements)
+        return order_id
+
+    def record_close(self, ticket, price, profit=None, now=None):
+        """Journal a position closed outside the bot, e.g. by hand or a stop-out
+
+        `profit` is the broker's realized figure when known; without it
+        the close is scored from the price like the bot's own closes.
+        Returns False when the ticket was not an open journal trade.
+        """
+        statements = self._close(ticket, price, now or time.time(), profit)
+        if statements:
+            self._write(*statements)
+        return bool(statements)
+
+    def open_tickets(self):
+        """Tickets of the trades the journal still has open"""
+        with self._lock:
+            return set(self._open)
+
+    def _close(self, ticket, price, now, profit=None):
+        with self._lock:
+            trade = self._open.pop(ticket, None)
+            if trade is None:
+                # Opened before the journal existed, or already journalled closed
+                return []
+            if profit is None:
+                sign = 1 if trade['side'] == 'buy' else -1
+                profit = (price - trade['open_price']) * sign * trade['volume'] * CONTRACT_SIZE
+            profit = round(profit, 2)
+            totals = self._totals.setdefault(trade['symbol'], empty_totals())
+            totals['trades'] += 1
+            if profit > 0:
+                totals['wins'] += 1
+                totals['gross_win'] += profit
+            elif profit < 0:
+                totals['losses'] += 1
+                totals['gross_loss'] -= profit
+            row = (trade['symbol'],) + tuple(totals.values())
+        return [
+            ('UPDATE trades SET close_time = ?, close_price = ?, profit = ? WHERE ticket = ?',
+             (now, price, profit, ticket)),
+            ('INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?, ?, ?)', row),
+        ]
+
+    # -- queries -----------------------------------------------------------
+
+    def stats(self, symbol=None):
+        """Win rate, average win/loss and profit factor from the running totals"""
+        with self._lock:
+            if symbol is not None:
+                totals = dict(self._totals.get(symbol, empty_totals()))
+            else:
+                totals = empty_totals()
+                for per_symbol in self._totals.values():
+                    for key, value in per_symbol.items():
+                        totals[key] += value
+        return summarize_totals(totals)
+
+    def _query(self, table, symbol, since, until, limit, time_column='time', clauses=()):
+        clauses, params = list(clauses), []
+        if symbol is not None:
+            clauses.append('symbol = ?')
+            params.append(symbol)
+        if since is not None:
+            clauses.append(f'{time_column} >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append(f'{time_column} < ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        connection = sqlite3.connect(self.path)
+        try:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(
+                f'SELECT * FROM {table} {where} ORDER BY {time_column} DESC LIMIT ?',
+                params + [limit]).fetchall()
+        finally:
+            connection.close()
+        return [dict(row) for row in rows]
+
+    def signals(self, symbol=None, since=None, until=None, limit=100):
+        return self._query('signals', symbol, since, until, limit)
+
+    def orders(self, symbol=None, since=None, until=None, limit=100):
+        return self._query('orders', symbol, since, until, limit)
+
+    def trades(self, symbol=None, since=None, until=None, limit=100):
+        """Closed trades, newest first"""
+        return self._query('trades', symbol, since, until, limit, time_column='close_time',
+                           clauses=['close_time IS NOT NULL'])
+
+    def flush(self):
+        """Wait for queued writes to reach the database"""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._writer.close()
+
+
+def _float(value):
+    return float(value) if value is not None else None
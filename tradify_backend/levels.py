@@ -0,0 +1,168 @@
+# levels.py
+import time
+
+import numpy as np
+import pandas as pd
+
+SUPPORT = 0
+RESISTANCE = 1
+LEVEL_TYPES = ('support', 'resistance')
+
+# One row per detected level; 'index' is the bar the level was found on
+LEVEL_DTYPE = np.dtype([
+    ('index', np.int64),
+    ('time', 'datetime64[ns]'),
+    ('price', np.float64),
+    ('type', np.int8),
+])
+
+
+def round_digits_for(symbol):
+    """Decimal places the round-number rule is applied at for a symbol"""
+    return 3 if 'GBPUSD' in symbol else 5
+
+
+def find_levels(times, lows, highs, symbol, round_digits=None):
+    """Find round-number support/resistance levels over whole price arrays"""
+    lows = np.asarray(lows, dtype=np.float64)
+    highs = np.asarray(highs, dtype=np.float64)
+    n = len(lows)
+    if n < 5:
+        return np.empty(0, dtype=LEVEL_DTYPE)
+
+    # Bars 2..n-3 compared against both neighbours, as in the scalar loop
+    mid = slice(2, n - 2)
+    support = (lows[mid] < lows[1:n - 3]) & (lows[mid] < lows[3:n - 1])
+    resistance = (highs[mid] > highs[1:n - 3]) & (highs[mid] > highs[3:n - 1])
+
+    support_idx = np.flatnonzero(support) + 2
+    resistance_idx = np.flatnonzero(resistance) + 2
+
+    ndigits = round_digits_for(symbol) if round_digits is None else round_digits
+    scale = 10.0 ** ndigits
+    index = np.concatenate([support_idx, resistance_idx])
+    kind = np.concatenate([
+        np.full(len(support_idx), SUPPORT, dtype=np.int8),
+        np.full(len(resistance_idx), RESISTANCE, dtype=np.int8),
+    ])
+    # np.round is what round() does on the numpy floats the loop sees
+    price = np.round(
+        np.concatenate([lows[support_idx], highs[resistance_idx]]), ndigits)
+
+    # Keep only prices whose last rounded decimal is 0
+    keep = np.mod(price * scale, 10) == 0
+    index, kind, price = index[keep], kind[keep], price[keep]
+
+    # Same ordering as the loop: by bar, support before resistance
+    order = np.lexsort((kind, index))
+
+    levels = np.empty(len(order), dtype=LEVEL_DTYPE)
+    levels['index'] = index[order]
+    levels['time'] = np.asarray(times)[levels['index']]
+    levels['price'] = price[order]
+    levels['type'] = kind[order]
+    return levels
+
+
+def identify_levels(df):
+    """Run find_levels on a price DataFrame with a 'symbol' column"""
+    if df.empty:
+        return np.empty(0, dtype=LEVEL_DTYPE)
+    return find_levels(df['time'].to_numpy(), df['low'].to_numpy(),
+                       df['high'].to_numpy(), df['symbol'].iloc[0])
+
+
+def levels_to_dicts(levels):
+    """Convert a level array to the list-of-dicts format used by the bot"""
+    return [
+        {
+            'price': price,
+            'type': LEVEL_TYPES[kind],
+            'time': pd.Timestamp(ts),
+        }
+        for price, kind, ts in zip(levels['price'].tolist(),
+                                   levels['type'].tolist(),
+                                   levels['time'])
+    ]
+
+
+def identify_levels_loop(df):
+    """Original row-by-row detection, kept as the reference implementation"""
+    levels = []
+
+    for i in range(2, len(df)-2):
+        if df['low'][i] < df['low'][i-1] and df['low'][i] < df['low'][i+1]:
+            level = {
+                'price': df['low'][i],
+                'type': 'support',
+                'time': df['time'][i]
+            }
+            if 'GBPUSD' in df['symbol'].iloc[0]:
+                level['price'] = round(level['price'], 3)
+                if level['price'] * 1000 % 10 == 0:  # Third decimal is 0
+                    levels.append(level)
+            else:  # EURUSD
+                level['price'] = round(level['price'], 5)
+                if level['price'] * 100000 % 10 == 0:  # Fifth decimal is 0
+                    levels.append(level)
+
+        if df['high'][i] > df['high'][i-1] and df['high'][i] > df['high'][i+1]:
+            level = {
+                'price': df['high'][i],
+                'type': 'resistance',
+                'time': df['time'][i]
+            }
+            if 'GBPUSD' in df['symbol'].iloc[0]:
+                level['price'] = round(level['price'], 3)
+                if level['price'] * 1000 % 10 == 0:  # Third decimal is 0
+                    levels.append(level)
+            else:  # EURUSD
+                level['price'] = round(level['price'], 5)
+                if level['price'] * 100000 % 10 == 0:  # Fifth decimal is 0
+                    levels.append(level)
+
+    return levels
+
+
+def synthetic_bars(symbol, count, seed=0):
+    """Random-walk M1 bars quoted at 5 decimals, for benchmarks"""
+    rng = np.random.default_rng(seed)
+    close = np.round(1.1 + np.cumsum(rng.normal(0, 0.0002, count)), 5)
+    open_ = np.round(np.concatenate([[close[0]], close[:-1]]), 5)
+    spread = np.round(np.abs(rng.normal(0, 0.0003, count)), 5)
+    return pd.DataFrame({
+        'time': pd.date_range('2024-01-01', periods=count, freq='min'),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'symbol': symbol,
+    })
+
+
+def benchmark(sizes=(100, 1000, 10000, 50000), symbols=('EURUSD', 'GBPUSD')):
+    """Time the loop against the vectorized engine and check they agree"""
+    for symbol in symbols:
+        for count in sizes:
+            df = synthetic_bars(symbol, count)
+
+            start = time.perf_counter()
+            expected = identify_levels_loop(df)
+            loop_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            levels = identify_levels(df)
+            vector_time = time.perf_counter() - start
+
+            got = levels_to_dicts(levels)
+            if got != expected:
+                raise AssertionError(f"{symbol} x {count}: results differ")
+
+            print(f"{symbol} {count:>7} bars  loop {loop_time * 1000:9.2f} ms  "
+                  f"vectorized {vector_time * 1000:7.2f} ms  "
+                  f"x{loop_time / max(vector_time, 1e-9):7.1f}  "
+                  f"({len(levels)} levels)")
+
+
+if __name__ == "__main__":
+    benchmark()
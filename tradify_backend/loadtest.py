@@ -0,0 +1,120 @@
+# loadtest.py
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+ENDPOINTS = (
+    '/api/trades',
+    '/api/account',
+    '/api/chart/EURUSD',
+    '/api/chart/GBPUSD?count=1000&format=columns',
+    '/api/stats',
+)
+
+
+def percentiles(values):
+    values = np.asarray(values) * 1000
+    if not len(values):
+        return {}
+    return {'p50': float(np.percentile(values, 50)), 'p99': float(np.percentile(values, 99)),
+            'max': float(values.max())}
+
+
+def run_clients(app, clients, duration, endpoints=ENDPOINTS):
+    """Hit the API from `clients` threads for `duration` seconds"""
+    latencies = {endpoint: [] for endpoint in endpoints}
+    errors = {endpoint: 0 for endpoint in endpoints}
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        http = app.test_client()
+        i = offset
+        while time.perf_counter() < deadline:
+            endpoint = endpoints[i % len(endpoints)]
+            start = time.perf_counter()
+            response = http.get(endpoint, headers={'Accept-Encoding': 'gzip'})
+            latencies[endpoint].append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors[endpoint] += 1
+            i += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        endpoint: dict(requests=len(latencies[endpoint]), errors=errors[endpoint],
+                       **percentiles(latencies[endpoint]))
+        for endpoint in endpoints
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the bot and API against the simulated broker and load the API")
+    parser.add_argument('--history', help="Bar/tick files to replay; synthetic bars by default")
+    parser.add_argument('--speed', type=float, default=50.0, help="Replay speed vs real time")
+    parser.add_argument('--latency-ms', type=float, default=20.0, help="Order round-trip time")
+    parser.add_argument('--slippage-pips', type=float, default=0.5)
+    parser.add_argument('--spread-pips', type=float, default=1.0)
+    parser.add_argument('--clients', type=int, default=100, help="Concurrent API clients")
+    parser.add_argument('--duration', type=float, default=30.0, help="Wall-clock seconds")
+    parser.add_argument('--ml-threshold', type=float,
+                        help="Override the bot's threshold, e.g. 0 to trade every candidate")
+    parser.add_argument('--out', default='loadtest_results.json')
+    args = parser.parse_args()
+
+    # The gateway picks its broker when first used, so configure it first
+    os.environ['TRADIFY_BROKER'] = (
+        f"sim:{args.history or ''}?speed={args.speed}&latency_ms={args.latency_ms}"
+        f"&slippage_pips={args.slippage_pips}&spread_pips={args.spread_pips}")
+    news_file = os.path.join(tempfile.mkdtemp(prefix='loadtest_'), 'news.json')
+    with open(news_file, 'w') as f:
+        json.dump([], f)
+    os.environ['TRADIFY_NEWS_SOURCE'] = news_file  # offline, no news events
+
+    import api_server
+    from mt5_gateway import get_gateway
+
+    app = api_server.create_app()
+    api_server.start_engine(wait=True)
+    bot = api_server.bot
+    # Replayed bars carry their own dates; trade whenever they close
+    bot.trading_hours = dict(bot.trading_hours, look_start=datetime.min, newyork_end=datetime.max)
+    if args.ml_threshold is not None:
+        bot.ml_threshold = args.ml_threshold
+
+    wait_until = time.time() + 60
+    while bot.model is None and time.time() < wait_until:
+        time.sleep(0.1)
+
+    gateway = get_gateway()
+    broker = gateway.broker
+    sim_start = broker.clock.time()
+    start = time.perf_counter()
+    api = run_clients(app, args.clients, args.duration)
+    elapsed = time.perf_counter() - start
+
+    results = {
+        'config': vars(args),
+        'simMinutes': (broker.clock.time() - sim_start) / 60,
+        'requestsPerSecond': sum(e['requests'] for e in api.values()) / elapsed,
+        'api': api,
+        'broker': broker.stats(),
+        'gateway': {'calls': gateway.calls, 'cancelled': gateway.cancelled},
+        'journal': bot.journal.stats(),
+    }
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
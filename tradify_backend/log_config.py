@@ -0,0 +1,53 @@
+# log_config.py
+import json
+import logging
+import os
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def record_fields(record):
+    """The structured fields a call passed as extra={...}"""
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with extra fields as top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Plain text with extra fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        text = super().format(record)
+        fields = record_fields(record)
+        if fields:
+            text += ' ' + ' '.join(f"{k}={v}" for k, v in fields.items())
+        return text
+
+
+def configure_logging(level=None, fmt=None):
+    """Root logging from TRADIFY_LOG_LEVEL and TRADIFY_LOG_FORMAT (text or json)"""
+    level = level or os.environ.get('TRADIFY_LOG_LEVEL', 'INFO')
+    fmt = fmt or os.environ.get('TRADIFY_LOG_FORMAT', 'text')
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == 'json' else KeyValueFormatter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper())
@@ -0,0 +1,179 @@
+# metrics.py
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds, from sub-millisecond array work up to slow terminal calls
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, v in pairs)
+    return '{' + ','.join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + '}'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{format_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value set directly, or read from a callback at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name, help, labelnames=(), callback=None):
+        super().__init__(name, help, labelnames)
+        self.callback = callback  # returns a number, or {label tuple: number}
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self):
+        if self.callback is not None:
+            try:
+                value = self.callback()
+            except Exception:
+                value = None
+            if isinstance(value, dict):
+                with self._lock:
+                    self._values = dict(value)
+            elif value is not None:
+                self.set(value)
+        return super().render()
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram; observe() is a bisect and three adds"""
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_value(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f"{self.name}_bucket"
+                         f"{format_labels(self.labelnames, key, [('le', le)])} {cumulative}")
+        labels = format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=(), callback=None):
+        return self.register(Gauge(name, help, labelnames, callback))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Candle-close budget, in the order a bar close spends it
+BAR_CLOSE_DELAY = REGISTRY.histogram(
+    'tradify_bar_close_delay_seconds',
+    "From a bar's close to the strategy starting on it", ('timeframe',))
+SIGNAL_CYCLE = REGISTRY.histogram(
+    'tradify_signal_cycle_seconds', "One get_trading_signal call", ('outcome',))
+FETCH = REGISTRY.histogram(
+    'tradify_fetch_seconds', "Pulling bars from the terminal into the bar store", ('kind',))
+LEVELS = REGISTRY.histogram(
+    'tradify_levels_seconds', "Support/resistance detection for one symbol")
+FEATURES = REGISTRY.histogram(
+    'tradify_features_seconds', "Indicator and feature rows for one symbol")
+INFERENCE = REGISTRY.histogram(
+    'tradify_inference_seconds', "One model prediction call", ('mode',))
+ORDER_ROUND_TRIP = REGISTRY.histogram(
+    'tradify_order_round_trip_seconds', "order_send including requote retries", ('outcome',))
+
+# Terminal access through the gateway
+MT5_QUEUE_WAIT = REGISTRY.histogram(
+    'tradify_mt5_queue_wait_seconds', "Time a call waits for the gateway thread", ('priority',))
+MT5_CALL = REGISTRY.histogram(
+    'tradify_mt5_call_seconds', "Time inside one MetaTrader5 call", ('function',))
+
+# HTTP
+HTTP_REQUEST = REGISTRY.histogram(
+    'tradify_http_request_seconds', "API handler time", ('method', 'route', 'status'))
+
+SIGNALS = REGISTRY.counter('tradify_signals_total', "Trading signals produced", ('action',))
+ORDERS = REGISTRY.counter('tradify_orders_total', "Orders sent", ('outcome',))
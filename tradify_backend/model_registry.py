@@ -0,0 +1,178 @@
+# model_registry.py
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import xgboost as xgb
+
+from features import FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Versioned model files with background loading and atomic hot-swap
+
+    Versions live in `directory` as model-<version>.model. The active
+    Booster is only replaced after the new one has loaded and answered a
+    warm-up prediction, so signal evaluation never waits on a load.
+    """
+
+    def __init__(self, directory='models', fallback_path='xgboost_model.model'):
+        self.directory = directory
+        self.fallback_path = fallback_path  # used when the registry is empty
+        self.on_swap = []  # called as callback(version, booster) after a swap
+        self.version = None
+        self.booster = None
+        self.loaded_at = None
+        self.warmup_ms = None
+        self.loading = None  # version currently loading in the background
+        self.pinned = False  # set by an explicit rollback; the watcher leaves it alone
+        self._seen_latest = None  # newest version the watcher has acted on
+        self._lock = threading.Lock()
+        self._latency = {'count': 0, 'rows': 0, 'total_ms': 0.0, 'last_ms': None, 'max_ms': 0.0}
+
+    def path_for(self, version):
+        if version == 'baseline':
+            return self.fallback_path
+        return os.path.join(self.directory, f"model-{version}.model")
+
+    def versions(self):
+        """Published versions, oldest first"""
+        found = []
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.startswith('model-') and name.endswith('.model'):
+                    found.append(name[len('model-'):-len('.model')])
+        found.sort()
+        if not found and os.path.exists(self.fallback_path):
+            found.append('baseline')
+        return found
+
+    def latest_version(self):
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def publish(self, path, version=None):
+        """Copy a trained model file into the registry as a new version"""
+        version = version or datetime.now().strftime('%Y%m%d-%H%M%S')
+        os.makedirs(self.directory, exist_ok=True)
+        target = self.path_for(version)
+        # Copy then rename, so a concurrent versions() never sees half a file
+        shutil.copyfile(path, target + '.tmp')
+        os.replace(target + '.tmp', target)
+        logger.info("Published model version", extra={'version': version})
+        return version
+
+    def load(self, version):
+        """Load a version and run a warm-up prediction; returns (booster, ms)"""
+        booster = xgb.Booster()
+        booster.load_model(self.path_for(version))
+
+        # The first predict call allocates buffers and spins up threads;
+        # pay that here rather than on the first live signal
+        start = time.perf_counter()
+        booster.inplace_predict(np.zeros((1, len(FEATURE_NAMES)), dtype=np.float32))
+        warmup_ms = (time.perf_counter() - start) * 1000
+        booster.inplace_predict(np.zeros((64, len(FEATURE_NAMES)), dtype=np.float32))
+        return booster, warmup_ms
+
+    def activate(self, version=None):
+        """Load a version (latest by default) and swap it in"""
+        version = version or self.latest_version()
+        if version is None:
+            logger.warning("No model versions available")
+            return False
+        try:
+            booster, warmup_ms = self.load(version)
+        except Exception:
+            logger.exception("Failed to load model version", extra={'version': version})
+            return False
+
+        with self._lock:
+            self.version, self.booster = version, booster
+            self.loaded_at = datetime.now()
+            self.warmup_ms = warmup_ms
+            self._latency = {'count': 0, 'rows': 0, 'total_ms': 0.0, 'last_ms': None, 'max_ms': 0.0}
+        for callback in self.on_swap:
+            callback(version, booster)
+        logger.info("Activated model version",
+                    extra={'version': version, 'warmup_ms': round(warmup_ms, 1)})
+        return True
+
+    def activate_async(self, version=None):
+        """activate() on a background thread"""
+        def run():
+            self.loading = version or self.latest_version()
+            try:
+                self.activate(version)
+            finally:
+                self.loading = None
+
+        thread = threading.Thread(target=run, name='model-loader', daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _is_newer(version, than):
+        # Published versions sort by time; the fallback file predates them all
+        if than is None or than == 'baseline':
+            return version != than
+        return version != 'baseline' and version > than
+
+    def watch(self, interval=60.0):
+        """Hot-swap to newly published versions as they appear
+
+        Only a version newer than any seen before triggers a swap, so a
+        rollback to an older one sticks; while pinned, new versions are
+        noted but not activated.
+        """
+        self._seen_latest = self.latest_version()
+
+        def run():
+            while True:
+                time.sleep(interval)
+                latest = self.latest_version()
+                if latest is None or not self._is_newer(latest, self._seen_latest):
+                    continue
+                self._seen_latest = latest
+                if not self.pinned and latest != self.version:
+                    self.activate(latest)
+
+        thread = threading.Thread(target=run, name='model-watcher', daemon=True)
+        thread.start()
+        return thread
+
+    def record_latency(self, elapsed_ms, rows=1):
+        """Record one live prediction call"""
+        with self._lock:
+            stats = self._latency
+            stats['count'] += 1
+            stats['rows'] += rows
+            stats['total_ms'] += elapsed_ms
+            stats['last_ms'] = elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    def status(self):
+        """Active version and inference latency, for /api/model"""
+        with self._lock:
+            stats = self._latency
+            return {
+                'version': self.version,
+                'loadedAt': self.loaded_at.isoformat() if self.loaded_at else None,
+                'loading': self.loading,
+                'pinned': self.pinned,
+                'available': self.versions(),
+                'warmupMs': self.warmup_ms,
+                'inference': {
+                    'calls': stats['count'],
+                    'rows': stats['rows'],
+                    'avgMs': stats['total_ms'] / stats['count'] if stats['count'] else None,
+                    'lastMs': stats['last_ms'],
+                    'maxMs': stats['max_ms'],
+                },
+            }
@@ -0,0 +1,196 @@
+# mt5_gateway.py
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from urllib.parse import parse_qsl
+
+from metrics import MT5_CALL, MT5_QUEUE_WAIT
+
+# Call priorities: lower runs first, so the trading engine is never
+# queued behind dashboard traffic
+ENGINE = 0
+DASHBOARD = 1
+PRIORITY_NAMES = {ENGINE: 'engine', DASHBOARD: 'dashboard'}
+
+# MetaTrader5's timeframe values, for tables built at import time, before
+# any broker exists
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+
+
+# The broker interface: the MetaTrader5 functions the bot and API call.
+# A backend is any object providing these plus the MetaTrader5 constants
+BROKER_FUNCTIONS = (
+    'initialize', 'shutdown', 'last_error', 'account_info', 'symbol_select', 'symbol_info',
+    'symbol_info_tick', 'copy_rates_from_pos', 'copy_rates_range', 'positions_get', 'order_send',
+    'history_deals_get',
+)
+
+
+class GatewayTimeout(TimeoutError):
+    """A terminal call did not complete within its deadline"""
+
+
+def broker_from(spec):
+    """A broker backend from a spec string
+
+    'mt5' (the default) is the MetaTrader5 terminal. 'sim[:history_dir]'
+    replays bars from a directory, or synthetic bars without one, and
+    takes SimulatedBroker options as a query string, e.g.
+    sim:history?speed=50&latency_ms=20&slippage_pips=0.5
+    (symbols= takes a comma-separated list for the synthetic bars).
+    """
+    kind, _, rest = (spec or 'mt5').partition(':')
+    if kind == 'mt5':
+        import MetaTrader5
+        broker = MetaTrader5
+    elif kind == 'sim':
+        from sim_broker import SimulatedBroker
+        directory, _, query = rest.partition('?')
+        options = {name: tuple(value.split(',')) if name == 'symbols' else float(value)
+                   for name, value in parse_qsl(query)}
+        broker = SimulatedBroker.from_history(directory or None, **options)
+    else:
+        raise ValueError(f"Unknown broker '{spec}', expected 'mt5' or 'sim[:history_dir]'")
+
+    missing = [name for name in BROKER_FUNCTIONS if not callable(getattr(broker, name, None))]
+    if missing:
+        raise TypeError(f"Broker {broker!r} lacks {', '.join(missing)}")
+    return broker
+
+
+class MT5Gateway:
+    """Runs every MetaTrader5 call on one thread, in priority order
+
+    The MetaTrader5 module is not safe to call from several threads at
+    once. Callers on any thread submit (priority, function, args) and
+    block on a Future; the gateway thread executes them one at a time.
+    A caller that gives up waiting cancels its call if it has not
+    started yet, so an abandoned dashboard request costs the terminal
+    nothing.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()  # FIFO within a priority
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.calls = 0
+        self.cancelled = 0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='mt5-gateway', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            priority, _, queued_at, future, function, args, kwargs = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                self.cancelled += 1
+                continue
+            self.calls += 1
+            start = time.perf_counter()
+            MT5_QUEUE_WAIT.observe(start - queued_at, priority=PRIORITY_NAMES.get(priority, priority))
+            try:
+                future.set_result(function(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            MT5_CALL.observe(time.perf_counter() - start,
+                             function=getattr(function, '__name__', 'unknown'))
+
+    def submit(self, priority, function, *args, **kwargs):
+        """Queue a call; returns its Future"""
+        self.start()
+        future = Future()
+        self._queue.put((priority, next(self._order), time.perf_counter(), future,
+                         function, args, kwargs))
+        return future
+
+    def call(self, priority, function, *args, timeout=None, **kwargs):
+        """Run function(*args) on the gateway thread and wait for the result"""
+        if threading.current_thread() is self._thread:
+            return function(*args, **kwargs)
+        future = self.submit(priority, function, *args, **kwargs)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise GatewayTimeout(f"{function.__name__} timed out after {timeout}s") from None
+
+    def pending(self):
+        return self._queue.qsize()
+
+    @property
+    def clock(self):
+        """The broker's replay clock if it has one; None means wall time"""
+        return getattr(self.broker, 'clock', None)
+
+    def proxy(self, priority=ENGINE, timeout=None):
+        """A stand-in for the MetaTrader5 module that routes calls through the gateway"""
+        return MT5Proxy(self, priority, timeout)
+
+
+class MT5Proxy:
+    """Module-like view of MetaTrader5: constants pass through, functions are queued
+
+    Without a gateway it uses the shared one from get_gateway(), which is
+    only built when the first attribute is looked up.
+    """
+
+    def __init__(self, gateway, priority, timeout):
+        self._gateway = gateway
+        self._priority = priority
+        self._timeout = timeout
+        self._wrapped = {}
+
+    def __getattr__(self, name):
+        gateway = self._gateway or get_gateway()
+        attr = getattr(gateway.broker, name)
+        if not callable(attr):
+            return attr
+        wrapper = self._wrapped.get(name)
+        if wrapper is None:
+            def wrapper(*args, **kwargs):
+                return gateway.call(self._priority, attr, *args,
+                                    timeout=self._timeout, **kwargs)
+            wrapper.__name__ = name
+            self._wrapped[name] = wrapper
+        return wrapper
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """The process-wide gateway, built on first use
+
+    TRADIFY_BROKER picks the backend (see broker_from). Nothing connects
+    or loads bars at import, so modules that talk to the terminal can be
+    imported, and tested, without MetaTrader5 installed.
+    """
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = MT5Gateway(broker_from(os.environ.get('TRADIFY_BROKER')))
+        return _gateway
+
+
+def proxy(priority=ENGINE, timeout=None):
+    """An MT5Proxy on the shared gateway, which it leaves unbuilt until used"""
+    return MT5Proxy(None, priority, timeout)
+
+
+# Drop-in for `import MetaTrader5 as mt5` on the engine side
+mt5 = proxy(ENGINE)
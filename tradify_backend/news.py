@@ -0,0 +1,274 @@
+# news.py
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+FOREX_FACTORY_URL = "https://www.forexfactory.com/calendar"
+TIME_FORMATS = ("%H:%M", "%I:%M%p")
+
+
+def naive_local(moment):
+    """Aware datetimes (e.g. ISO '...Z') as naive local time, like datetime.now()"""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+
+def parse_event_time(text, day):
+    """'14:30' or '2:30pm' on `day`; None for 'All Day', 'Tentative', etc."""
+    text = text.strip().lower()
+    for fmt in TIME_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+        return datetime.combine(day, parsed)
+    return None
+
+
+def parse_calendar_day(text, today):
+    """'Mon Jan 8' / 'MonJan 8' -> date in the year closest to today"""
+    text = text.strip()
+    for start in range(len(text)):
+        try:
+            parsed = datetime.strptime(text[start:].strip(), "%b %d")
+        except ValueError:
+            continue
+        # The calendar shows no year; pick the one that lands nearest today
+        candidates = [parsed.replace(year=today.year + k).date() for k in (-1, 0, 1)]
+        return min(candidates, key=lambda d: abs(d - today))
+    return None
+
+
+def parse_calendar_html(html, currencies=('USD',), now=None):
+    """High-impact events from a Forex Factory calendar page"""
+    from bs4 import BeautifulSoup  # only live and saved pages need a parser
+
+    now = now or datetime.now()
+    soup = BeautifulSoup(html, 'html.parser')
+    events = []
+    day = now.date()
+    last_time = None
+    for row in soup.select('.calendar__row'):
+        date_cell = row.select_one('.calendar__date')
+        if date_cell is not None and date_cell.text.strip():
+            day = parse_calendar_day(date_cell.text, now.date()) or day
+            last_time = None
+        time_cell = row.select_one('.calendar__time')
+        if time_cell is not None and time_cell.text.strip():
+            last_time = time_cell.text.strip()
+        # Rows sharing a time with the previous row leave the cell blank
+        if 'calendar__row--high' not in row.get('class', []) or last_time is None:
+            continue
+
+        currency = row.select_one('.calendar__currency')
+        title = row.select_one('.calendar__event-title')
+        if currency is None or title is None or currency.text.strip() not in currencies:
+            continue
+        event_time = parse_event_time(last_time, day)
+        if event_time is not None:
+            events.append({'time': event_time, 'title': title.text.strip(),
+                           'currency': currency.text.strip()})
+    return events
+
+
+def parse_calendar_json(text, currencies=('USD',), now=None):
+    """Events from a JSON list of {time, title, currency}
+
+    `time` is an ISO datetime, or HH:MM meaning today. Times with an
+    offset are converted to naive local time.
+    """
+    now = now or datetime.now()
+    events = []
+    for item in json.loads(text):
+        if item.get('currency', 'USD') not in currencies:
+            continue
+        try:
+            event_time = naive_local(datetime.fromisoformat(item['time']))
+        except ValueError:
+            event_time = parse_event_time(item['time'], now.date())
+        if event_time is not None:
+            events.append({'time': event_time, 'title': item.get('title', ''),
+                           'currency': item.get('currency', 'USD')})
+    return events
+
+
+class ForexFactorySource:
+    """Live calendar page"""
+
+    def __init__(self, url=FOREX_FACTORY_URL, timeout=(5, 20)):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self, currencies):
+        import requests
+
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return parse_calendar_html(response.text, currencies)
+
+    def __repr__(self):
+        return self.url
+
+
+class FileSource:
+    """Saved calendar page (.html) or event list (.json), for offline use"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def fetch(self, currencies):
+        with open(self.path, encoding='utf-8') as f:
+            text = f.read()
+        if self.path.endswith('.json'):
+            return parse_calendar_json(text, currencies)
+        return parse_calendar_html(text, currencies)
+
+    def __repr__(self):
+        return self.path
+
+
+def source_from(spec):
+    """A source from a URL or file path; the live calendar by default"""
+    if not spec:
+        return ForexFactorySource()
+    if spec.startswith(('http://', 'https://')):
+        return ForexFactorySource(spec)
+    return FileSource(spec)
+
+
+class NewsCalendar:
+    """High-impact events, refreshed in the background, indexed by time
+
+    Checks never touch the network: they bisect the current index and, if
+    it has gone stale, ask the background thread to refresh. The parsed
+    calendar is saved to `path` so a restart has events immediately.
+    """
+
+    def __init__(self, source=None, path='news_calendar.json', refresh_interval=3600.0,
+                 window=900.0, currencies=('USD',)):
+        self.source = source or ForexFactorySource()
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.window = timedelta(seconds=window)
+        self.currencies = tuple(currencies)
+        self.last_updated = None
+        self.last_error = None
+        # (sorted times, events) replaced as one tuple so readers never
+        # see times and events from different refreshes
+        self._index = ([], [])
+        self._wake = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self.load()
+
+    @property
+    def events(self):
+        return self._index[1]
+
+    def set_events(self, events, updated=None):
+        # Queries compare against naive datetime.now(); an aware time here
+        # would make every is_news_time() call raise
+        events = sorted((dict(e, time=naive_local(e['time'])) for e in events),
+                        key=lambda e: e['time'])
+        self._index = ([e['time'] for e in events], events)
+        self.last_updated = updated or datetime.now()
+
+    def load(self):
+        """Restore the last saved calendar, if any"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+            events = [dict(e, time=datetime.fromisoformat(e['time'])) for e in saved['events']]
+            self.set_events(events, naive_local(datetime.fromisoformat(saved['last_updated'])))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring saved news calendar", extra={'path': self.path, 'error': e})
+            return False
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+        saved = {
+            'last_updated': self.last_updated.isoformat(),
+            'source': repr(self.source),
+            'events': [dict(e, time=e['time'].isoformat()) for e in self.events],
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(saved, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self):
+        """Fetch and re-index the calendar; keeps the old one on failure"""
+        with self._refresh_lock:
+            try:
+                events = self.source.fetch(self.currencies)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("News refresh failed",
+                               extra={'source': repr(self.source), 'error': self.last_error})
+                return False
+            self.last_error = None
+            self.set_events(events)
+            self.save()
+            logger.info("Loaded high-impact news events", extra={'events': len(events)})
+            return True
+
+    def is_stale(self, now=None):
+        if self.last_updated is None:
+            return True
+        now = now or datetime.now()
+        return (now - self.last_updated).total_seconds() > self.refresh_interval
+
+    def is_news_time(self, now=None):
+        """True if an event falls within `window` of now"""
+        now = now or datetime.now()
+        if self.is_stale(now):
+            self._wake.set()  # refresh in the background, answer from what we have
+        times, _ = self._index
+        i = bisect_left(times, now - self.window)
+        return i < len(times) and times[i] <= now + self.window
+
+    def upcoming(self, now=None, limit=10):
+        """The next `limit` events from now"""
+        now = now or datetime.now()
+        times, events = self._index
+        i = bisect_left(times, now)
+        return events[i:i + limit]
+
+    def start(self):
+        """Refresh on a background thread, on a timer and whenever stale"""
+        def run():
+            while True:
+                if self.is_stale():
+                    if not self.refresh():
+                        # Back off a little before retrying a failing source
+                        self._wake.wait(min(60.0, self.refresh_interval))
+                        self._wake.clear()
+                        continue
+                remaining = self.refresh_interval - (datetime.now() - self.last_updated).total_seconds()
+                self._wake.wait(max(remaining, 1.0))
+                self._wake.clear()
+
+        thread = threading.Thread(target=run, name='news-refresh', daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    # python news.py [url-or-file]: fetch once and print the parsed events
+    calendar = NewsCalendar(source_from(sys.argv[1] if len(sys.argv) > 1 else None), path=None)
+    start = time.perf_counter()
+    calendar.refresh()
+    print(f"Fetched in {time.perf_counter() - start:.2f}s")
+    for event in calendar.events:
+        print(event['time'].isoformat(), event['currency'], event['title'])
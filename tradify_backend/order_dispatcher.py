@@ -0,0 +1,69 @@
+# order_dispatcher.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import ORDER_ROUND_TRIP, ORDERS
+from mt5_gateway import mt5
+
+# Retcodes where resending at the current price is worth a try; the
+# MetaTrader5 values, since no broker is loaded at import
+RETRY_RETCODES = {
+    10004,  # TRADE_RETCODE_REQUOTE
+    10020,  # TRADE_RETCODE_PRICE_CHANGED
+    10021,  # TRADE_RETCODE_PRICE_OFF
+}
+
+
+class OrderDispatcher:
+    """Send independent orders concurrently through a bounded worker pool"""
+
+    def __init__(self, max_workers=8, max_retries=3):
+        self.max_retries = max_retries
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='order')
+
+    def price_request(self, request, result=None):
+        """Fill in the current price for the order's side"""
+        buy = request['type'] == mt5.ORDER_TYPE_BUY
+        # A requote carries the broker's new bid/ask, saving a tick lookup
+        if result is not None and (result.ask if buy else result.bid):
+            return dict(request, price=result.ask if buy else result.bid)
+        tick = mt5.symbol_info_tick(request['symbol'])
+        if tick is None:
+            return request
+        return dict(request, price=tick.ask if buy else tick.bid)
+
+    def send(self, request):
+        """Send one order, re-pricing on requotes within its deviation"""
+        start = time.perf_counter()
+        if 'price' not in request:
+            request = self.price_request(request)
+
+        attempts = 0
+        while True:
+            attempts += 1
+            result = mt5.order_send(request)
+            if (result is None or result.retcode not in RETRY_RETCODES
+                    or attempts > self.max_retries):
+                break
+            request = self.price_request(request, result)
+
+        latency = time.perf_counter() - start
+        outcome = 'done' if result is not None and result.retcode == mt5.TRADE_RETCODE_DONE else 'failed'
+        ORDER_ROUND_TRIP.observe(latency, outcome=outcome)
+        ORDERS.inc(outcome=outcome)
+        return {
+            'request': request,
+            'result': result,
+            'attempts': attempts,
+            'latency_ms': latency * 1000,
+        }
+
+    def submit_all(self, requests):
+        """Send all orders at once; outcomes come back in request order"""
+        if len(requests) == 1:
+            return [self.send(requests[0])]
+        return list(self.executor.map(self.send, requests))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,217 @@
+# scheduler.py
+import heapq
+import itertools
+import threading
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mt5_gateway import (TIMEFRAME_D1, TIMEFRAME_H1, TIMEFRAME_H4, TIMEFRAME_M1, TIMEFRAME_M5,
+                         TIMEFRAME_M15, TIMEFRAME_M30, mt5)
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAME_SECONDS = {
+    TIMEFRAME_M1: 60,
+    TIMEFRAME_M5: 5 * 60,
+    TIMEFRAME_M15: 15 * 60,
+    TIMEFRAME_M30: 30 * 60,
+    TIMEFRAME_H1: 60 * 60,
+    TIMEFRAME_H4: 4 * 60 * 60,
+    TIMEFRAME_D1: 24 * 60 * 60,
+}
+# Names accepted by the API's ?timeframe= parameter
+TIMEFRAME_NAMES = {
+    'M1': TIMEFRAME_M1,
+    'M5': TIMEFRAME_M5,
+    'M15': TIMEFRAME_M15,
+    'M30': TIMEFRAME_M30,
+    'H1': TIMEFRAME_H1,
+    'H4': TIMEFRAME_H4,
+    'D1': TIMEFRAME_D1,
+}
+
+
+def timeframe_name(timeframe):
+    """'M15' for mt5.TIMEFRAME_M15, or the raw value for anything unlisted"""
+    for name, value in TIMEFRAME_NAMES.items():
+        if value == timeframe:
+            return name
+    return str(timeframe)
+
+
+class WallClock:
+    """Real time; a broker replaying history supplies a faster clock"""
+    speed = 1.0
+
+    @staticmethod
+    def time():
+        return time.time()
+
+
+class Job:
+    def __init__(self, name, callback, log_skips=True):
+        self.name = name
+        self.callback = callback
+        self.log_skips = log_skips
+        self.running = threading.Lock()  # a job never overlaps itself
+
+
+class EventScheduler:
+    """Fire callbacks on bar close, tick changes and timers
+
+    One thread sleeps until the next due time; callbacks run on a worker
+    pool so slow strategies do not hold up other jobs. A job that is
+    still running when it fires again skips that firing.
+    """
+
+    def __init__(self, bar_store, max_workers=4, close_grace=0.2,
+                 close_retry=0.25, close_timeout=10.0, clock=None):
+        self.bar_store = bar_store
+        self.clock = clock or WallClock()  # due times are in this clock's seconds
+        self.close_grace = close_grace  # seconds after the boundary before checking
+        self.close_retry = close_retry
+        self.close_timeout = close_timeout  # give up on a boundary after this long
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='strategy')
+        self._queue = []
+        self._counter = itertools.count()
+        self._wakeup = threading.Condition()
+        self._stopped = threading.Event()
+        self._server_offset = None
+
+    def _schedule(self, when, action):
+        with self._wakeup:
+            heapq.heappush(self._queue, (when, next(self._counter), action))
+            self._wakeup.notify()
+
+    def _dispatch(self, job, *args):
+        if not job.running.acquire(blocking=False):
+            if job.log_skips:
+                logger.warning("Skipping job, previous run still in progress",
+                               extra={'job': job.name})
+            return
+
+        def run():
+            try:
+                job.callback(*args)
+            except Exception:
+                logger.exception("Scheduled job failed", extra={'job': job.name})
+            finally:
+                job.running.release()
+
+        self.executor.submit(run)
+
+    def server_offset(self, symbol):
+        """Seconds the trade server clock runs ahead of UTC, whole hours"""
+        if self._server_offset is None:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None or not tick.time:
+                return 0
+            self._server_offset = round((tick.time - self.clock.time()) / 3600) * 3600
+        return self._server_offset
+
+    def next_bar_close(self, symbol, timeframe, now=None):
+        """Clock time of the next bar boundary for a timeframe"""
+        now = self.clock.time() if now is None else now
+        period = TIMEFRAME_SECONDS[timeframe]
+        # Bars are aligned in server time, which matters from H4 upwards
+        offset = self.server_offset(symbol) if period > 3600 else 0
+        return ((now + offset) // period + 1) * period - offset
+
+    def on_bar_close(self, symbols, timeframe, callback):
+        """Call callback(symbols, timeframe) each time their bar closes"""
+        symbols = list(symbols)
+        job = Job(f"bar_close:{','.join(symbols)}:{timeframe}", callback)
+
+        def last_times():
+            return {symbol: self.bar_store.last_time(symbol, timeframe) or 0
+                    for symbol in symbols}
+
+        def arm():
+            seen = last_times()
+            boundary = self.next_bar_close(symbols[0], timeframe)
+            self._schedule(boundary + self.close_grace, lambda: check(boundary, seen))
+
+        def check(boundary, seen):
+            # The terminal can lag the clock slightly; wait for the new bar
+            # to actually appear before evaluating. Every symbol is pulled
+            # past the store's refresh interval, since a dashboard read just
+            # before the boundary would otherwise leave it on pre-close data.
+            # Another reader may have pulled a bar already, so compare bar
+            # times rather than counts.
+            for symbol in symbols:
+                if (self.bar_store.last_time(symbol, timeframe) or 0) <= seen[symbol]:
+                    self.bar_store.update(symbol, timeframe, force=True)
+            now = last_times()
+            advanced = [symbol for symbol in symbols if now[symbol] > seen[symbol]]
+            if len(advanced) == len(symbols):
+                self._dispatch(job, symbols, timeframe)
+            elif self.clock.time() < boundary + self.close_timeout:
+                self._schedule(self.clock.time() + self.close_retry,
+                               lambda: check(boundary, seen))
+                return
+            elif advanced:
+                # Out of time: a symbol with no ticks this bar has no new
+                # candle to wait for, so go with the ones that closed
+                self._dispatch(job, symbols, timeframe)
+            arm()
+
+        # Prime the store so the first close is detected as a new bar
+        for symbol in symbols:
+            self.bar_store.update(symbol, timeframe, force=True)
+        arm()
+        return job
+
+    def on_tick(self, symbols, callback, interval=0.25):
+        """Call callback(symbol, tick) whenever a symbol's last tick changes"""
+        symbols = list(symbols)
+        job = Job(f"tick:{','.join(symbols)}", callback, log_skips=False)
+        last_seen = {}
+
+        def poll():
+            for symbol in symbols:
+                tick = mt5.symbol_info_tick(symbol)
+                if tick is not None and last_seen.get(symbol) != tick.time_msc:
+                    last_seen[symbol] = tick.time_msc
+                    self._dispatch(job, symbol, tick)
+            self._schedule(self.clock.time() + interval, poll)
+
+        self._schedule(self.clock.time(), poll)
+        return job
+
+    def every(self, interval, callback, name=None):
+        """Call callback() every `interval` seconds"""
+        job = Job(name or f"timer:{interval}", callback)
+
+        def fire(when):
+            self._dispatch(job)
+            self._schedule(when + interval, lambda: fire(when + interval))
+
+        start = self.clock.time() + interval
+        self._schedule(start, lambda: fire(start))
+        return job
+
+    def run(self):
+        """Process due events until stop() is called"""
+        while not self._stopped.is_set():
+            with self._wakeup:
+                if not self._queue:
+                    self._wakeup.wait()
+                    continue
+                when, _, action = self._queue[0]
+                delay = when - self.clock.time()
+                if delay > 0:
+                    self._wakeup.wait(delay / self.clock.speed)
+                    continue
+                heapq.heappop(self._queue)
+            try:
+                action()
+            except Exception:
+                logger.exception("Scheduler event failed")
+
+    def stop(self):
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify()
+        self.executor.shutdown(wait=True)
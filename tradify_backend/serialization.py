@@ -0,0 +1,90 @@
+# serialization.py
+import gzip
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder produces the same JSON
+    orjson = None
+
+OHLC_FIELDS = ('open', 'high', 'low', 'close')
+FORMATS = ('rows', 'columns', 'binary')
+GZIP_MIN_BYTES = 1024  # smaller bodies are not worth compressing
+GZIP_LEVEL = 5
+
+
+def encode_json(payload):
+    """Compact JSON bytes; orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(',', ':')).encode()
+
+
+def iso_times(times):
+    """Epoch seconds -> 'YYYY-MM-DDTHH:MM:SS' strings, as Timestamp.isoformat() gives"""
+    return np.datetime_as_string(np.asarray(times).astype('datetime64[s]'), unit='s').tolist()
+
+
+def chart_rows(bars):
+    """Bars as the list of {time, open, high, low, close} dicts /api/chart returns"""
+    columns = [iso_times(bars['time'])] + [bars[field].tolist() for field in OHLC_FIELDS]
+    return [
+        {'time': t, 'open': o, 'high': h, 'low': l, 'close': c}
+        for t, o, h, l, c in zip(*columns)
+    ]
+
+
+def chart_columns(bars):
+    """Bars as parallel arrays with epoch-second times"""
+    payload = {'time': np.ascontiguousarray(bars['time'], dtype=np.int64)}
+    for field in OHLC_FIELDS:
+        payload[field] = np.ascontiguousarray(bars[field], dtype=np.float64)
+    if orjson is None:
+        payload = {name: column.tolist() for name, column in payload.items()}
+    return payload
+
+
+def chart_binary(bars):
+    """Little-endian int64 times then float64 open, high, low and close, column after column"""
+    parts = [np.ascontiguousarray(bars['time'], dtype='<i8').tobytes()]
+    parts.extend(np.ascontiguousarray(bars[field], dtype='<f8').tobytes() for field in OHLC_FIELDS)
+    return b''.join(parts)
+
+
+def encode_chart(bars, fmt='rows'):
+    """(body, content type) for bars in one of FORMATS"""
+    if fmt == 'binary':
+        return chart_binary(bars), 'application/octet-stream'
+    if fmt == 'columns':
+        return encode_json(chart_columns(bars)), 'application/json'
+    return encode_json(chart_rows(bars)), 'application/json'
+
+
+def accepts_gzip(accept_encoding):
+    return 'gzip' in (accept_encoding or '').lower()
+
+
+class EncodedBody:
+    """Encoded bytes that keep their gzipped form once it has been made
+
+    Cached responses hold one of these, so a hit compresses nothing.
+    """
+
+    __slots__ = ('raw', '_gzipped')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._gzipped = None
+
+    def __len__(self):
+        return len(self.raw)
+
+    def for_client(self, accept_encoding):
+        """(body, content encoding or None), compressing when the client accepts it"""
+        if len(self.raw) < GZIP_MIN_BYTES or not accepts_gzip(accept_encoding):
+            return self.raw, None
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.raw, GZIP_LEVEL)
+        return self._gzipped, 'gzip'
@@ -0,0 +1,155 @@
+# sharding.py
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def shard_symbols(symbols, shards):
+    """Deduplicated symbols dealt round-robin into at most `shards` lists"""
+    symbols = list(dict.fromkeys(symbols))
+    shards = max(1, min(shards, len(symbols)))
+    return [symbols[i::shards] for i in range(shards)]
+
+
+def run_shard(shard, symbols, version, clock_origin, commands, results):
+    """Worker process: evaluate one shard of the watchlist on request
+
+    Each worker has its own gateway and terminal connection (from the
+    same TRADIFY_BROKER spec), bar store, indicator state and model, so
+    fetch, levels, features and inference for its symbols run on their
+    own core. It never trades; candidate signals go back to the
+    coordinator.
+    """
+    from log_config import configure_logging
+    from mt5_gateway import get_gateway, mt5
+    from trading_bot import ShardEvaluator
+
+    configure_logging()
+    clock = get_gateway().clock
+    if clock is not None and clock_origin is not None:
+        # Replay in step with the coordinator rather than from our own start
+        clock.wall_start = clock_origin
+    if not mt5.initialize():
+        logger.error("MT5 initialization failed in shard", extra={'shard': shard})
+        return
+    evaluator = ShardEvaluator(symbols, version)
+    results.put((None, shard, None, 0.0))  # ready
+
+    while True:
+        command = commands.get()
+        if command[0] == 'stop':
+            break
+        if command[0] == 'model':
+            evaluator.model_registry.activate(command[1])
+        elif command[0] == 'evaluate':
+            _, cycle, ml_threshold, closed = command
+            evaluator.ml_threshold = ml_threshold
+            start = time.perf_counter()
+            try:
+                # No model yet: the coordinator is still training one
+                signals = (evaluator.evaluate_signals_batched(closed)
+                           if evaluator.model is not None else [])
+            except Exception:
+                logger.exception("Shard evaluation failed", extra={'shard': shard})
+                signals = []
+            results.put((cycle, shard, signals, time.perf_counter() - start))
+    mt5.shutdown()
+
+
+class ShardPool:
+    """Worker processes that each evaluate a fixed slice of the symbols
+
+    evaluate() asks every worker for its candidate signals for one bar
+    close and gathers them, in watchlist order, for the coordinator to
+    pair and trade. Workers still starting up, and any that miss the
+    deadline, are left out of a cycle rather than holding up the others.
+    """
+
+    def __init__(self, symbols, shards, timeout=10.0):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.shards = shard_symbols(self.symbols, shards)
+        self.timeout = timeout
+        self._context = multiprocessing.get_context('spawn')
+        self._results = self._context.Queue()
+        self._cycles = itertools.count()
+        self._lock = threading.Lock()  # one cycle in flight on the shared results queue
+        self._workers = []  # (process, command queue) per shard
+        self._ready = set()
+        self.last_cycle = {}  # shard -> seconds its last evaluation took
+
+    def start(self, version=None, clock=None):
+        clock_origin = getattr(clock, 'wall_start', None)
+        for shard, symbols in enumerate(self.shards):
+            commands = self._context.Queue()
+            process = self._context.Process(
+                target=run_shard, name=f'shard-{shard}',
+                args=(shard, symbols, version, clock_origin, commands, self._results),
+                daemon=True)
+            process.start()
+            self._workers.append((process, commands))
+        logger.info("Started symbol shards", extra={
+            'shards': len(self.shards), 'symbols': len(self.symbols)})
+
+    def set_model(self, version, booster=None):
+        """Have every worker load the version the coordinator swapped to"""
+        for _, commands in self._workers:
+            commands.put(('model', version))
+
+    def evaluate(self, ml_threshold, closed=False):
+        """Candidate signals from every shard for one evaluation cycle"""
+        with self._lock:
+            cycle = next(self._cycles)
+            self._collect(block=False)
+            live = [shard for shard, (process, commands) in enumerate(self._workers)
+                    if shard in self._ready and process.is_alive()]
+            for shard in live:
+                self._workers[shard][1].put(('evaluate', cycle, ml_threshold, closed))
+
+            signals = []
+            waiting = set(live)
+            deadline = time.monotonic() + self.timeout
+            while waiting:
+                try:
+                    result_cycle, shard, shard_signals, elapsed = self._results.get(
+                        timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    logger.warning("Shards missed the evaluation deadline",
+                                   extra={'shards': ','.join(map(str, sorted(waiting)))})
+                    break
+                if result_cycle is None:
+                    self._ready.add(shard)
+                    continue
+                if result_cycle != cycle:
+                    continue  # a late answer to an earlier cycle
+                waiting.discard(shard)
+                self.last_cycle[shard] = elapsed
+                signals.extend(shard_signals)
+
+        order = {symbol: i for i, symbol in enumerate(self.symbols)}
+        signals.sort(key=lambda signal: order.get(signal['symbol'], len(order)))
+        return signals
+
+    def _collect(self, block):
+        """Note workers that have finished starting up"""
+        while True:
+            try:
+                result_cycle, shard, _, _ = self._results.get(block=block)
+            except queue.Empty:
+                return
+            if result_cycle is None:
+                self._ready.add(shard)
+
+    def stop(self):
+        for _, commands in self._workers:
+            commands.put(('stop',))
+        for process, _ in self._workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._workers = []
+        self._ready.clear()
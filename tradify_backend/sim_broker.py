@@ -0,0 +1,407 @@
+# sim_broker.py
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from backtest import BAR_DTYPE, CONTRACT_SIZE, EXIT_PIP, load_bars, symbol_from_path
+from levels import synthetic_bars
+
+# Same layout as MetaTrader5.copy_rates_*
+RATE_DTYPE = np.dtype([
+    ('time', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('tick_volume', '<u8'),
+    ('spread', '<i4'),
+    ('real_volume', '<u8'),
+])
+POINT = 0.00001
+TICKS_PER_BAR = 4  # open, first extreme, second extreme, close
+
+# The fields of the MetaTrader5 structures the bot and API read
+Tick = namedtuple('Tick', 'time bid ask last volume time_msc flags volume_real')
+TradePosition = namedtuple('TradePosition', 'ticket time type magic volume price_open '
+                                            'price_current profit symbol comment')
+TradeDeal = namedtuple('TradeDeal', 'ticket order time type entry magic position_id volume price '
+                                    'commission swap profit fee symbol comment')
+OrderSendResult = namedtuple('OrderSendResult', 'retcode deal order volume price bid ask '
+                                                'comment request_id retcode_external request')
+AccountInfo = namedtuple('AccountInfo', 'login balance equity profit margin margin_free '
+                                        'leverage currency server')
+SymbolInfo = namedtuple('SymbolInfo', 'name point digits spread visible bid ask')
+
+
+class SimClock:
+    """Replay time: starts at `start` and runs `speed` times faster than the wall clock"""
+
+    def __init__(self, start, speed=1.0, end=None):
+        self.start = float(start)
+        self.speed = float(speed)
+        self.end = end  # the clock stops here, at the end of the data
+        self.wall_start = None
+
+    def begin(self):
+        if self.wall_start is None:
+            self.wall_start = time.time()
+
+    def time(self):
+        if self.wall_start is None:
+            return self.start
+        now = self.start + (time.time() - self.wall_start) * self.speed
+        return now if self.end is None else min(now, self.end)
+
+    def wall_at(self, sim_time):
+        """Wall-clock time at which the replay reached sim_time"""
+        return self.wall_start + (sim_time - self.start) / self.speed
+
+
+def load_ticks(path):
+    """time_msc, bid and ask arrays from a CSV/Parquet tick file"""
+    df = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    df.columns = [c.strip().lower() for c in df.columns]
+    if 'time_msc' in df:
+        times = df['time_msc'].to_numpy(dtype=np.int64)
+    elif pd.api.types.is_numeric_dtype(df['time']):
+        times = df['time'].to_numpy(dtype=np.int64) * 1000
+    else:
+        times = pd.to_datetime(df['time']).to_numpy().astype('datetime64[ms]').astype(np.int64)
+    order = np.argsort(times, kind='stable')
+    return (times[order], df['bid'].to_numpy(np.float64)[order],
+            df['ask'].to_numpy(np.float64)[order])
+
+
+class SimulatedBroker:
+    """Stand-in for the MetaTrader5 module that replays M1 bars and fills orders
+
+    Prices come from recorded ticks when given, otherwise from a path
+    through each bar (open, low/high, high/low, close). Higher timeframes
+    are aggregated from M1. Orders fill at the current bid/ask after
+    `latency_ms` of wall time, with up to `slippage_pips` of adverse
+    slippage, and are requoted when price has moved past their deviation.
+    Every fill records the wall time since the bar close that led to it.
+    """
+
+    # Constants with the same values as the MetaTrader5 module
+    TIMEFRAME_M1 = 1
+    TIMEFRAME_M5 = 5
+    TIMEFRAME_M15 = 15
+    TIMEFRAME_M30 = 30
+    TIMEFRAME_H1 = 16385
+    TIMEFRAME_H4 = 16388
+    TIMEFRAME_D1 = 16408
+    ORDER_TYPE_BUY = 0
+    ORDER_TYPE_SELL = 1
+    TRADE_ACTION_DEAL = 1
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_IOC = 1
+    DEAL_TYPE_BUY = 0
+    DEAL_TYPE_SELL = 1
+    DEAL_ENTRY_IN = 0
+    DEAL_ENTRY_OUT = 1
+    TRADE_RETCODE_REQUOTE = 10004
+    TRADE_RETCODE_DONE = 10009
+    TRADE_RETCODE_INVALID = 10013
+    TRADE_RETCODE_PRICE_CHANGED = 10020
+    TRADE_RETCODE_PRICE_OFF = 10021
+
+    PERIODS = {TIMEFRAME_M1: 60, TIMEFRAME_M5: 300, TIMEFRAME_M15: 900, TIMEFRAME_M30: 1800,
+               TIMEFRAME_H1: 3600, TIMEFRAME_H4: 14400, TIMEFRAME_D1: 86400}
+
+    def __init__(self, bars_by_symbol, ticks_by_symbol=None, speed=1.0, latency_ms=0.0,
+                 slippage_pips=0.0, spread_pips=1.0, warmup_bars=1000, balance=10000.0,
+                 tick_seconds=1.0, seed=0):
+        self.bars = {symbol: np.ascontiguousarray(bars) for symbol, bars in bars_by_symbol.items()}
+        self.ticks = ticks_by_symbol or {}
+        self.latency_ms = float(latency_ms)
+        self.slippage_pips = float(slippage_pips)
+        self.spread = float(spread_pips) * EXIT_PIP
+        self.tick_seconds = float(tick_seconds)
+        self.balance = float(balance)
+        self.rng = np.random.default_rng(int(seed))
+
+        # Start late enough that every symbol has warm-up history behind it
+        warmup_bars = int(warmup_bars)
+        start = max(b['time'][min(warmup_bars, len(b) - 1)] for b in self.bars.values())
+        end = min(b['time'][-1] for b in self.bars.values()) + 59
+        self.clock = SimClock(start, speed, end)
+
+        self._lock = threading.Lock()
+        self._aggregates = {}
+        self._positions = {}
+        self._deals = []
+        self._next_ticket = 1
+        self._last_error = (1, 'Success')
+        self.orders = 0
+        self.requotes = 0
+        self.fills = []
+
+    @classmethod
+    def from_history(cls, directory=None, symbols=('EURUSD', 'GBPUSD'), bars=200000, **options):
+        """Bars (and <SYMBOL>_ticks files) from a directory, or synthetic bars"""
+        bars_by_symbol, ticks_by_symbol = {}, {}
+        if directory:
+            from training import history_files
+            for path in history_files(directory):
+                if '_ticks' in path:
+                    ticks_by_symbol[symbol_from_path(path)] = load_ticks(path)
+                else:
+                    bars_by_symbol[symbol_from_path(path)] = load_bars(path)
+        if not bars_by_symbol:
+            for seed, symbol in enumerate(symbols):
+                df = synthetic_bars(symbol, int(bars), seed)
+                data = np.empty(len(df), dtype=BAR_DTYPE)
+                data['time'] = df['time'].to_numpy().astype('datetime64[s]').astype(np.int64)
+                for field in ('open', 'high', 'low', 'close'):
+                    data[field] = df[field].to_numpy()
+                bars_by_symbol[symbol] = data
+        return cls(bars_by_symbol, ticks_by_symbol, **options)
+
+    # -- prices ------------------------------------------------------------
+
+    def _bar_index(self, symbol, now):
+        """Index of the M1 bar forming at `now`"""
+        return max(int(np.searchsorted(self.bars[symbol]['time'], now, 'right')) - 1, 0)
+
+    def _path_price(self, bar, fraction):
+        """Price a fraction of the way through a bar's open-extreme-extreme-close path"""
+        if bar['close'] >= bar['open']:
+            knots = (bar['open'], bar['low'], bar['high'], bar['close'])
+        else:
+            knots = (bar['open'], bar['high'], bar['low'], bar['close'])
+        return float(np.interp(fraction, (0, 1 / 3, 2 / 3, 1), knots)), knots
+
+    def _forming_bar(self, symbol, now):
+        """The M1 bar at `now`, with only the part of its path seen so far"""
+        bars = self.bars[symbol]
+        i = self._bar_index(symbol, now)
+        bar = bars[i]
+        fraction = min(max((now - bar['time']) / 60, 0.0), 1.0)
+        price, knots = self._path_price(bar, fraction)
+        price = round(price, 5)
+        seen = [k for k, at in zip(knots, (0, 1 / 3, 2 / 3, 1)) if at <= fraction] + [price]
+        return i, (bar['time'], bar['open'], max(seen), min(seen), price)
+
+    def _aggregate(self, symbol, timeframe):
+        """Completed-bar arrays for a higher timeframe, built from M1 once"""
+        key = (symbol, timeframe)
+        if key not in self._aggregates:
+            bars = self.bars[symbol]
+            period = self.PERIODS[timeframe]
+            bucket = bars['time'] // period
+            starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+            agg = np.empty(len(starts), dtype=BAR_DTYPE)
+            agg['time'] = bucket[starts] * period
+            agg['open'] = bars['open'][starts]
+            agg['high'] = np.maximum.reduceat(bars['high'], starts)
+            agg['low'] = np.minimum.reduceat(bars['low'], starts)
+            agg['close'] = bars['close'][np.r_[starts[1:] - 1, len(bars) - 1]]
+            group = np.cumsum(np.r_[True, bucket[1:] != bucket[:-1]]) - 1
+            self._aggregates[key] = (agg, starts, group)
+        return self._aggregates[key]
+
+    def _bars_at(self, symbol, timeframe, now):
+        """Completed bars (a view) and the forming bar's values at `now`"""
+        now = now // self.tick_seconds * self.tick_seconds  # in step with _tick
+        bars = self.bars[symbol]
+        i, forming = self._forming_bar(symbol, now)
+        if timeframe == self.TIMEFRAME_M1:
+            return bars[:i], forming
+        agg, starts, group = self._aggregate(symbol, timeframe)
+        g = group[i]
+        first = starts[g]
+        forming = (agg['time'][g], bars['open'][first],
+                   max(bars['high'][first:i].max(initial=-np.inf), forming[2]),
+                   min(bars['low'][first:i].min(initial=np.inf), forming[3]), forming[4])
+        return agg[:g], forming
+
+    def _rates(self, completed, forming=None):
+        """RATE_DTYPE rows for a slice of completed bars plus, optionally, the forming one"""
+        rates = np.zeros(len(completed) + (forming is not None), dtype=RATE_DTYPE)
+        for field in BAR_DTYPE.names:
+            rates[field][:len(completed)] = completed[field]
+        if forming is not None:
+            for field, value in zip(BAR_DTYPE.names, forming):
+                rates[field][-1] = value
+        rates['tick_volume'] = TICKS_PER_BAR
+        rates['spread'] = round(self.spread / POINT)
+        return rates
+
+    def _tick(self, symbol, now):
+        if symbol in self.ticks:
+            times, bids, asks = self.ticks[symbol]
+            j = max(int(np.searchsorted(times, now * 1000, 'right')) - 1, 0)
+            return Tick(int(times[j] // 1000), bids[j], asks[j], 0.0, 0, int(times[j]), 0, 0.0)
+        # Quotes move in steps of tick_seconds rather than continuously
+        now = now // self.tick_seconds * self.tick_seconds
+        _, forming = self._forming_bar(symbol, now)
+        bid = forming[4]
+        return Tick(int(now), bid, round(bid + self.spread, 5), 0.0, 0, int(now * 1000), 0, 0.0)
+
+    # -- MetaTrader5 functions ---------------------------------------------
+
+    def initialize(self, *args, **kwargs):
+        self.clock.begin()
+        return True
+
+    def shutdown(self):
+        return None
+
+    def last_error(self):
+        return self._last_error
+
+    def symbol_select(self, symbol, enable=True):
+        return symbol in self.bars
+
+    def symbol_info(self, symbol):
+        if symbol not in self.bars:
+            return None
+        tick = self._tick(symbol, self.clock.time())
+        return SymbolInfo(symbol, POINT, 5, round(self.spread / POINT), True, tick.bid, tick.ask)
+
+    def symbol_info_tick(self, symbol):
+        if symbol not in self.bars:
+            self._last_error = (-1, f"Unknown symbol {symbol}")
+            return None
+        return self._tick(symbol, self.clock.time())
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        if symbol not in self.bars:
+            return None
+        completed, forming = self._bars_at(symbol, timeframe, self.clock.time())
+        # Position 0 is the forming bar, 1 the last completed one, ...
+        end = len(completed) + 1 - start_pos
+        begin = max(end - count, 0)
+        if end <= len(completed):
+            return self._rates(completed[begin:max(end, 0)])
+        return self._rates(completed[begin:], forming)
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        if symbol not in self.bars:
+            return None
+        completed, forming = self._bars_at(symbol, timeframe, self.clock.time())
+        start, stop = int(date_from.timestamp()), int(date_to.timestamp())
+        lo = np.searchsorted(completed['time'], start, 'left')
+        hi = np.searchsorted(completed['time'], stop, 'right')
+        include_forming = start <= forming[0] <= stop
+        return self._rates(completed[lo:hi], forming if include_forming else None)
+
+    def account_info(self):
+        profit = sum(p.profit for p in self.positions_get())
+        equity = self.balance + profit
+        return AccountInfo(0, self.balance, equity, profit, 0.0, equity, 100, 'USD', 'Simulated')
+
+    def _position(self, record, now):
+        tick = self._tick(record['symbol'], now)
+        buy = record['type'] == self.ORDER_TYPE_BUY
+        current = tick.bid if buy else tick.ask
+        profit = (current - record['price_open']) * (1 if buy else -1) * record['volume'] * CONTRACT_SIZE
+        return TradePosition(record['ticket'], record['time'], record['type'], record['magic'],
+                             record['volume'], record['price_open'], current, round(profit, 2),
+                             record['symbol'], record['comment'])
+
+    def positions_get(self, symbol=None, ticket=None, **kwargs):
+        now = self.clock.time()
+        with self._lock:
+            records = list(self._positions.values())
+        return tuple(self._position(r, now) for r in records
+                     if (symbol is None or r['symbol'] == symbol)
+                     and (ticket is None or r['ticket'] == ticket))
+
+    def history_deals_get(self, date_from=None, date_to=None, position=None, **kwargs):
+        start = date_from.timestamp() if date_from is not None else float('-inf')
+        stop = date_to.timestamp() if date_to is not None else float('inf')
+        with self._lock:
+            deals = list(self._deals)
+        return tuple(d for d in deals if start <= d.time <= stop
+                     and (position is None or d.position_id == position))
+
+    def order_send(self, request):
+        self.orders += 1
+        if self.latency_ms:
+            # Wall time, like a real round trip, whatever the replay speed
+            time.sleep(self.latency_ms / 1000)
+
+        symbol = request.get('symbol')
+        now = self.clock.time()
+        if symbol not in self.bars:
+            return self._result(self.TRADE_RETCODE_INVALID, request, comment='Invalid request')
+        tick = self._tick(symbol, now)
+        buy = request['type'] == self.ORDER_TYPE_BUY
+        market = tick.ask if buy else tick.bid
+
+        requested = request.get('price')
+        if requested and abs(market - requested) > request.get('deviation', 0) * POINT:
+            self.requotes += 1
+            return self._result(self.TRADE_RETCODE_REQUOTE, request, bid=tick.bid, ask=tick.ask,
+                                comment='Requote')
+
+        slippage = self.rng.uniform(0, self.slippage_pips) if self.slippage_pips else 0.0
+        price = round(market + (slippage if buy else -slippage) * EXIT_PIP, 5)
+
+        with self._lock:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            if request.get('position'):
+                record = self._positions.pop(request['position'], None)
+                if record is None:
+                    return self._result(self.TRADE_RETCODE_INVALID, request,
+                                        comment='Position not found')
+                sign = 1 if record['type'] == self.ORDER_TYPE_BUY else -1
+                profit = (price - record['price_open']) * sign * record['volume'] * CONTRACT_SIZE
+                self.balance += profit
+                self._deals.append(TradeDeal(
+                    ticket, ticket, int(now), request['type'], self.DEAL_ENTRY_OUT,
+                    request.get('magic', 0), record['ticket'], record['volume'], price,
+                    0.0, 0.0, round(profit, 2), 0.0, symbol, request.get('comment', '')))
+            else:
+                self._positions[ticket] = {
+                    'ticket': ticket, 'time': int(now), 'type': request['type'],
+                    'magic': request.get('magic', 0), 'volume': request['volume'],
+                    'price_open': price, 'symbol': symbol, 'comment': request.get('comment', ''),
+                }
+                self._deals.append(TradeDeal(
+                    ticket, ticket, int(now), request['type'], self.DEAL_ENTRY_IN,
+                    request.get('magic', 0), ticket, request['volume'], price,
+                    0.0, 0.0, 0.0, 0.0, symbol, request.get('comment', '')))
+            # From the open of the forming bar, i.e. the close that
+            # triggered the signal, to this fill
+            bar_close = self.bars[symbol]['time'][self._bar_index(symbol, now)]
+            self.fills.append({
+                'symbol': symbol,
+                'buy': buy,
+                'price': price,
+                'slippage_pips': slippage,
+                'signal_to_fill_ms': (time.time() - self.clock.wall_at(bar_close)) * 1000,
+            })
+        return self._result(self.TRADE_RETCODE_DONE, request, price=price, bid=tick.bid,
+                            ask=tick.ask, deal=ticket, order=ticket, comment='Request executed')
+
+    def _result(self, retcode, request, price=0.0, bid=0.0, ask=0.0, deal=0, order=0, comment=''):
+        return OrderSendResult(retcode, deal, order, request.get('volume', 0.0), price, bid, ask,
+                               comment, 0, 0, request)
+
+    # -- reporting ---------------------------------------------------------
+
+    def stats(self):
+        """Order counts, signal-to-fill latency and slippage so far"""
+        with self._lock:
+            fills = list(self.fills)
+        latency = np.array([f['signal_to_fill_ms'] for f in fills])
+        slippage = np.array([f['slippage_pips'] for f in fills])
+        percentile = lambda q: float(np.percentile(latency, q)) if len(latency) else None
+        return {
+            'simTime': self.clock.time(),
+            'orders': self.orders,
+            'fills': len(fills),
+            'requotes': self.requotes,
+            'openPositions': len(self._positions),
+            'balance': round(self.balance, 2),
+            'signalToFillMs': {'p50': percentile(50), 'p95': percentile(95),
+                               'p99': percentile(99), 'max': percentile(100)},
+            'avgSlippagePips': float(slippage.mean()) if len(slippage) else None,
+        }
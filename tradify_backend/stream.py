@@ -0,0 +1,220 @@
+# stream.py
+import json
+import logging
+import queue
+import threading
+import time
+
+from mt5_gateway import DASHBOARD, TIMEFRAME_M1, proxy
+from serialization import chart_rows
+
+logger = logging.getLogger(__name__)
+
+# Dashboard traffic; queued behind the trading engine's terminal calls, and
+# dropped for this poll rather than waited on when the terminal is busy
+POLL_TIMEOUT = 2.0
+mt5 = proxy(DASHBOARD, timeout=POLL_TIMEOUT)
+
+
+def position_row(pos, tick):
+    """One open position in the /api/trades row format"""
+    buy = pos.type == mt5.ORDER_TYPE_BUY
+    return {
+        'symbol': pos.symbol,
+        'direction': 'long' if buy else 'short',
+        'entryPrice': pos.price_open,
+        'currentPrice': tick.bid if buy else tick.ask,
+        'lotSize': pos.volume,
+        'profitLoss': pos.profit
+    }
+
+
+class Subscription:
+    """One client's queue of encoded messages"""
+
+    def __init__(self, symbols, maxsize):
+        self.symbols = set(symbols) if symbols else None
+        self.queue = queue.Queue(maxsize)
+        self.closed = False  # set when the client fell too far behind
+
+    def wants(self, symbol):
+        return self.symbols is None or symbol is None or symbol in self.symbols
+
+    def get(self, timeout=None):
+        """Next (event, data) pair, or None on timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class MarketFeed:
+    """Single producer of bar, tick and position updates, fanned out to subscribers
+
+    One thread polls the bar store and the terminal, diffs against the last
+    state and encodes each change once; subscribers only receive the
+    encoded deltas. New subscribers get a snapshot of the current state
+    first. The producer runs only while someone is subscribed.
+    """
+
+    def __init__(self, bar_store, symbols, timeframe=TIMEFRAME_M1, count=100,
+                 interval=0.25, queue_size=1000):
+        self.bar_store = bar_store
+        self.symbols = list(dict.fromkeys(symbols))
+        self.timeframe = timeframe
+        self.count = count
+        self.interval = interval
+        self.queue_size = queue_size
+        self.seq = 0
+        self._subscribers = []
+        self._lock = threading.Lock()  # guards subscribers, state and seq
+        self._thread = None
+        self._reset_state()
+
+    def _reset_state(self):
+        self._bars = {}  # symbol -> list of bar rows, oldest first
+        self._bar_times = {}  # symbol -> open time of the newest bar
+        self._ticks = {}  # symbol -> tick row
+        self._positions = {}  # ticket -> position row
+
+    def snapshot(self, symbols=None):
+        wanted = set(symbols) if symbols else None
+        keep = lambda symbol: wanted is None or symbol in wanted
+        return {
+            'seq': self.seq,
+            'bars': {s: rows for s, rows in self._bars.items() if keep(s)},
+            'ticks': {s: tick for s, tick in self._ticks.items() if keep(s)},
+            'positions': [dict(row, ticket=ticket) for ticket, row in self._positions.items()
+                          if keep(row['symbol'])],
+        }
+
+    def subscribe(self, symbols=None):
+        """Register a client; its queue starts with a snapshot"""
+        subscription = Subscription(symbols, self.queue_size)
+        with self._lock:
+            # Snapshot and registration under one lock, so no delta falls
+            # between the two
+            subscription.queue.put(('snapshot', json.dumps(self.snapshot(symbols))))
+            self._subscribers.append(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='market-feed', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event, message, symbol=None):
+        """Encode once, queue for every interested subscriber (caller holds _lock)"""
+        self.seq += 1
+        data = json.dumps(dict(message, seq=self.seq))
+        for subscription in list(self._subscribers):
+            if not subscription.wants(symbol):
+                continue
+            try:
+                subscription.queue.put_nowait((event, data))
+            except queue.Full:
+                # Too slow to keep up; drop it and let the client reconnect
+                # for a fresh snapshot rather than buffer without bound
+                subscription.closed = True
+                self._subscribers.remove(subscription)
+
+    def _diff_bars(self, symbol, bars):
+        if bars is None:
+            return
+        rows = self._bars.get(symbol)
+        if rows is None:
+            rows = self._bars[symbol] = chart_rows(bars)
+            self._bar_times[symbol] = int(bars['time'][-1])
+            self.publish('bars', {'symbol': symbol, 'bars': rows}, symbol)
+            return
+
+        # Only the forming bar and any newer ones can have changed
+        last_time = self._bar_times[symbol]
+        tail = bars[bars['time'] >= last_time]
+        for bar_time, row in zip(tail['time'].tolist(), chart_rows(tail)):
+            if bar_time == last_time:
+                if row == rows[-1]:
+                    continue
+                rows[-1] = row
+            else:
+                rows.append(row)
+            self.publish('bar', {'symbol': symbol, 'bar': row}, symbol)
+        self._bar_times[symbol] = int(bars['time'][-1])
+        del rows[:-self.count]
+
+    def _diff_tick(self, symbol, tick):
+        if tick is None:
+            return
+        row = {'bid': tick.bid, 'ask': tick.ask, 'time': tick.time}
+        previous = self._ticks.get(symbol)
+        if previous is None or previous['bid'] != row['bid'] or previous['ask'] != row['ask']:
+            self._ticks[symbol] = row
+            self.publish('tick', dict(row, symbol=symbol), symbol)
+
+    def _diff_positions(self, positions, ticks):
+        if positions is None:
+            return
+        seen = set()
+        for pos in positions:
+            tick = ticks.get(pos.symbol)
+            if tick is None:
+                continue
+            row = position_row(pos, tick)
+            seen.add(pos.ticket)
+            previous = self._positions.get(pos.ticket)
+            if previous is None:
+                self.publish('position', dict(row, ticket=pos.ticket, action='open'), pos.symbol)
+            elif (previous['profitLoss'] != row['profitLoss']
+                  or previous['currentPrice'] != row['currentPrice']):
+                self.publish('position', {'ticket': pos.ticket, 'symbol': pos.symbol,
+                                          'action': 'update',
+                                          'currentPrice': row['currentPrice'],
+                                          'profitLoss': row['profitLoss']}, pos.symbol)
+            self._positions[pos.ticket] = row
+        for ticket in list(self._positions):
+            if ticket not in seen:
+                row = self._positions.pop(ticket)
+                self.publish('position', {'ticket': ticket, 'symbol': row['symbol'],
+                                          'action': 'close'}, row['symbol'])
+
+    def poll(self):
+        """Diff one round of terminal state against the last and publish changes
+
+        The terminal calls run before the lock is taken, so subscribe()
+        and unsubscribe() only ever wait for the diff, not the terminal.
+        """
+        bars = {symbol: self.bar_store.bars(symbol, self.timeframe, self.count,
+                                            priority=DASHBOARD, timeout=POLL_TIMEOUT)
+                for symbol in self.symbols}
+        ticks = {symbol: mt5.symbol_info_tick(symbol) for symbol in self.symbols}
+        positions = mt5.positions_get()
+        for pos in positions or ():
+            if ticks.get(pos.symbol) is None:
+                ticks[pos.symbol] = mt5.symbol_info_tick(pos.symbol)
+
+        with self._lock:
+            for symbol in self.symbols:
+                self._diff_bars(symbol, bars[symbol])
+                self._diff_tick(symbol, ticks[symbol])
+            self._diff_positions(positions, ticks)
+
+    def _run(self):
+        while True:
+            start = time.monotonic()
+            with self._lock:
+                if not self._subscribers:
+                    # Nobody listening: stop, and forget state that would go stale
+                    self._thread = None
+                    self._reset_state()
+                    return
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Market feed poll failed")
+            time.sleep(max(0.0, self.interval - (time.monotonic() - start)))
@@ -0,0 +1,148 @@
+# sweep.py
+import argparse
+import itertools
+import logging
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from backtest import load_bars, run_backtest, score_candidates, symbol_from_path
+from log_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Parameters that change which candidates exist; tasks are grouped on
+# these so each worker scores candidates once per group
+STRUCTURAL_PARAMS = ('proximity_pips', 'round_digits')
+# Parameters applied after scoring
+CHEAP_PARAMS = ('ml_threshold', 'lot_size')
+
+# Per-process state, set by init_worker
+_bars_by_symbol = None
+_model = None
+
+
+def share_bars(bars_by_symbol, directory):
+    """Write each symbol's bars to a .npy file workers can memory-map"""
+    paths = {}
+    for symbol, bars in bars_by_symbol.items():
+        path = os.path.join(directory, f"{symbol}.npy")
+        np.save(path, bars)
+        paths[symbol] = path
+    return paths
+
+
+def init_worker(paths, model_path):
+    """Map the shared bars read-only and load the model once per process"""
+    global _bars_by_symbol, _model
+    _bars_by_symbol = {symbol: np.load(path, mmap_mode='r') for symbol, path in paths.items()}
+    if model_path:
+        _model = xgb.Booster()
+        _model.load_model(model_path)
+        # One core per worker; the pool already spreads across cores
+        _model.set_param({'nthread': 1})
+
+
+def run_group(structural, combos, backtest_args):
+    """Score candidates once, then backtest every cheap combination"""
+    scored = {
+        symbol: score_candidates(bars, symbol, _model, proximity_pips=structural['proximity_pips'],
+                                 round_digits=structural['round_digits'])
+        for symbol, bars in _bars_by_symbol.items()
+    }
+    rows = []
+    for combo in combos:
+        start = time.perf_counter()
+        _, stats = run_backtest(_bars_by_symbol, scored=scored, **structural, **combo,
+                                **backtest_args)
+        rows.append(dict(structural, **combo, **stats,
+                         seconds=time.perf_counter() - start))
+    return rows
+
+
+def parameter_grid(space, samples=None, seed=0):
+    """Every combination in space, or `samples` of them drawn at random"""
+    names = list(space)
+    combos = [dict(zip(names, values)) for values in itertools.product(*space.values())]
+    if samples is not None and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return combos
+
+
+def run_sweep(bars_by_symbol, space, model_path=None, samples=None, workers=None,
+              seed=0, **backtest_args):
+    """Evaluate a parameter grid across a process pool; returns a DataFrame"""
+    groups = {}
+    for combo in parameter_grid(space, samples, seed):
+        key = tuple(combo[name] for name in STRUCTURAL_PARAMS)
+        groups.setdefault(key, []).append({name: combo[name] for name in CHEAP_PARAMS})
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix='sweep_') as directory:
+        paths = share_bars(bars_by_symbol, directory)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(paths, model_path)) as pool:
+            futures = [
+                pool.submit(run_group, dict(zip(STRUCTURAL_PARAMS, key)), combos, backtest_args)
+                for key, combos in groups.items()
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                rows.extend(future.result())
+                logger.info("Parameter group done", extra={'done': done, 'groups': len(futures)})
+
+    results = pd.DataFrame(rows)
+    # Compact on disk: small ints/floats and no Python objects
+    for column in ('trades',):
+        results[column] = results[column].astype(np.int32)
+    for column in ('ml_threshold', 'lot_size', 'proximity_pips', 'win_rate', 'profit_factor',
+                   'seconds'):
+        results[column] = results[column].astype(np.float32)
+    return results.sort_values('net_profit', ascending=False).reset_index(drop=True)
+
+
+def parse_values(text, cast=float):
+    """'0.6,0.7' -> [0.6, 0.7]; 'default' stands for None"""
+    return [None if v.strip() == 'default' else cast(v) for v in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep over the backtest")
+    parser.add_argument('paths', nargs='+', help="CSV/Parquet bar files named <SYMBOL>[_...].ext")
+    parser.add_argument('--model', default='xgboost_model.model')
+    parser.add_argument('--no-model', action='store_true')
+    parser.add_argument('--ml-threshold', default='0.5,0.6,0.7,0.8,0.9')
+    parser.add_argument('--lot-size', default='0.1')
+    parser.add_argument('--proximity-pips', default='2,3,5,8')
+    parser.add_argument('--round-digits', default='default,4',
+                        help="Decimal place for the round-number rule; default is per symbol")
+    parser.add_argument('--random', type=int, help="Sample this many combinations")
+    parser.add_argument('--workers', type=int, help="Defaults to all cores")
+    parser.add_argument('--out', default='sweep_results.parquet')
+    args = parser.parse_args()
+    configure_logging()
+
+    space = {
+        'ml_threshold': parse_values(args.ml_threshold),
+        'lot_size': parse_values(args.lot_size),
+        'proximity_pips': parse_values(args.proximity_pips),
+        'round_digits': parse_values(args.round_digits, int),
+    }
+    bars_by_symbol = {symbol_from_path(p): load_bars(p) for p in args.paths}
+    results = run_sweep(bars_by_symbol, space, None if args.no_model else args.model,
+                        args.random, args.workers)
+
+    if args.out.endswith('.parquet'):
+        results.to_parquet(args.out, index=False)
+    else:
+        results.to_csv(args.out, index=False)
+    print(results.head(10).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other by bare name, as when run from
+# tradify_backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def sim_gateway(monkeypatch):
+    """The shared gateway, over a small simulated broker instead of MetaTrader5"""
+    import mt5_gateway
+    from sim_broker import SimulatedBroker
+
+    broker = SimulatedBroker.from_history(bars=3000, speed=60)
+    broker.initialize()
+    gateway = mt5_gateway.MT5Gateway(broker)
+    monkeypatch.setattr(mt5_gateway, '_gateway', gateway)
+    return gateway
@@ -0,0 +1,20 @@
+# test_backtest.py
+import json
+
+import numpy as np
+
+from backtest import format_stats, summarize
+
+
+def test_profit_factor_without_losses_is_valid_json():
+    stats = summarize(np.array([12.0, 3.5]))
+    assert stats['profit_factor'] is None
+    body = json.dumps(format_stats(stats), allow_nan=False)
+    assert json.loads(body)['Profit Factor'] is None
+
+
+def test_profit_factor():
+    stats = summarize(np.array([30.0, -10.0, 10.0, -10.0]))
+    assert stats['profit_factor'] == 2.0
+    assert format_stats(stats)['Profit Factor'] == 2.0
+    assert summarize(np.array([]))['profit_factor'] == 0.0
@@ -0,0 +1,44 @@
+# test_bar_store.py
+import threading
+import time
+
+from bar_store import BarStore
+from mt5_gateway import DASHBOARD, TIMEFRAME_M1
+
+
+def test_bars_end_with_the_forming_bar(sim_gateway):
+    store = BarStore()
+    bars = store.bars('EURUSD', TIMEFRAME_M1, 50)
+    assert len(bars) == 50
+    assert not bars.flags.writeable
+    assert (bars['time'][1:] - bars['time'][:-1] == 60).all()
+    assert store.last_time('EURUSD', TIMEFRAME_M1) == bars['time'][-1]
+
+
+def test_unknown_symbols_get_no_series(sim_gateway):
+    store = BarStore()
+    for i in range(20):
+        assert store.bars(f'FOO{i}', TIMEFRAME_M1, 10) is None
+        assert store.last_time(f'FOO{i}', TIMEFRAME_M1) is None
+    assert store._series == {}
+
+
+def test_queued_dashboard_pull_does_not_block_engine_reads(sim_gateway):
+    store = BarStore()
+    store.bars('EURUSD', TIMEFRAME_M1, 50)
+
+    # Hold the gateway thread so the dashboard pull sits in its queue
+    release = threading.Event()
+    sim_gateway.submit(DASHBOARD, release.wait)
+    dashboard = threading.Thread(target=store.update, args=('EURUSD', TIMEFRAME_M1),
+                                 kwargs={'force': True, 'priority': DASHBOARD})
+    dashboard.start()
+    try:
+        time.sleep(0.05)
+        start = time.perf_counter()
+        bars = store.bars('EURUSD', TIMEFRAME_M1, 50)
+        assert time.perf_counter() - start < 0.5
+        assert len(bars) == 50
+    finally:
+        release.set()
+        dashboard.join()
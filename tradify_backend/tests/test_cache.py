@@ -0,0 +1,23 @@
+# test_cache.py
+import time
+
+from cache import ResponseCache
+
+
+def test_expired_keys_are_pruned():
+    cache = ResponseCache(default_ttl=0.01, prune_interval=0.0)
+    for count in range(100):
+        cache.get_or_compute(('chart', 'EURUSD', count), lambda: count)
+    time.sleep(0.02)
+    assert cache.get_or_compute(('chart', 'EURUSD', 1), lambda: 'fresh') == 'fresh'
+    assert list(cache._entries) == [('chart', 'EURUSD', 1)]
+
+
+def test_live_entries_survive_a_prune():
+    cache = ResponseCache(ttls={'account': 60.0}, default_ttl=0.01, prune_interval=0.0)
+    cache.get_or_compute(('account',), lambda: 'kept')
+    cache.get_or_compute(('trades',), lambda: 'gone')
+    time.sleep(0.02)
+    cache.get_or_compute(('chart', 'GBPUSD'), lambda: 'new')
+    assert set(cache._entries) == {('account',), ('chart', 'GBPUSD')}
+    assert cache.get_or_compute(('account',), lambda: 'recomputed') == 'kept'
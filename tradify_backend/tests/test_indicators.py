@@ -0,0 +1,84 @@
+# test_indicators.py
+import math
+
+import numpy as np
+import pytest
+
+from features import SMA_PERIODS, compute_indicators
+from indicators import IncrementalIndicators
+
+
+def random_walk(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.round(1.1 + np.cumsum(rng.normal(0, 0.0002, count)), 5)
+
+
+def same(got, want):
+    return got == want or (math.isnan(got) and math.isnan(want))
+
+
+@pytest.fixture(scope='module')
+def series():
+    close = random_walk(1000)
+    times = 1_700_000_000 + 60 * np.arange(len(close))
+    return times, close, compute_indicators(close)
+
+
+def test_warm_up_nans_match_full_recompute(series):
+    _, close, expected = series
+    engine = IncrementalIndicators()
+    rows = [engine.update(x) for x in close[:300]]
+    for name, column in expected.items():
+        got = np.array([row[name] for row in rows])
+        assert np.array_equal(got, column[:300], equal_nan=True), name
+
+    # The slowest SMA only exists once it has a full window behind it
+    slowest = max(SMA_PERIODS)
+    sma = np.array([row[f'sma_{slowest}'] for row in rows])
+    assert np.isnan(sma[:slowest - 1]).all()
+    assert not np.isnan(sma[slowest - 1:]).any()
+
+
+def test_preview_matches_update_without_committing(series):
+    times, close, expected = series
+    engine = IncrementalIndicators()
+    engine.warm_up(close[:500], times[:500])
+    for i in range(500, 600):
+        first = engine.preview(close[i] + 0.001)  # a forming bar that moves on
+        preview = engine.preview(close[i])
+        assert engine.last_time == times[i - 1]
+        assert engine.preview(close[i] + 0.001) == first
+        values = engine.update(close[i], times[i])
+        for name, column in expected.items():
+            assert same(preview[name], column[i]), (name, i)
+            assert same(values[name], column[i]), (name, i)
+
+
+def test_sync_across_overlapping_windows(series):
+    times, close, expected = series
+    engine = IncrementalIndicators()
+    engine.warm_up(close[:400], times[:400])
+
+    # Each fetch overlaps the last one and adds one to a few new bars
+    end = 400
+    for step in [1, 3, 1, 5, 2, 1, 4] * 10:
+        end += step
+        start = end - 300
+        assert engine.covers(times[start:end])
+        latest = engine.sync(times[start:end], close[start:end])
+        assert engine.last_time == times[end - 1]
+        for name, column in expected.items():
+            assert same(latest[name], column[end - 1]), (name, end)
+
+    # Re-syncing the same window feeds nothing twice
+    assert engine.sync(times[start:end], close[start:end]) == latest
+
+
+def test_covers_rejects_a_gap(series):
+    times, close, _ = series
+    engine = IncrementalIndicators()
+    assert not engine.covers(times[:10])
+    engine.warm_up(close[:100], times[:100])
+    assert engine.covers(times[50:150])
+    assert engine.covers(times[99:150])
+    assert not engine.covers(times[101:150])
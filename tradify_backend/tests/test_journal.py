@@ -0,0 +1,49 @@
+# test_journal.py
+import json
+from collections import namedtuple
+
+from backtest import format_stats
+from journal import TRADE_RETCODE_DONE, TradeJournal
+
+Result = namedtuple('Result', 'retcode order price comment')
+
+
+def fill(journal, ticket, price, side='buy', position=None):
+    request = {'symbol': 'EURUSD', 'volume': 0.1, 'price': price}
+    if position is not None:
+        request['position'] = position
+    outcome = {'request': request, 'result': Result(TRADE_RETCODE_DONE, ticket, price, 'done'),
+               'attempts': 1, 'latency_ms': 1.0}
+    journal.record_order(outcome, side)
+
+
+def test_stats_after_a_win_are_valid_json(tmp_path):
+    journal = TradeJournal(str(tmp_path / 'journal.db'))
+    try:
+        fill(journal, 1, 1.1000)
+        fill(journal, 2, 1.1010, side='sell', position=1)
+        stats = journal.stats()
+        assert stats['trades'] == 1 and stats['win_rate'] == 1.0
+        assert stats['profit_factor'] is None
+        assert json.loads(json.dumps(format_stats(stats), allow_nan=False))['Profit Factor'] is None
+
+        fill(journal, 3, 1.1010)
+        fill(journal, 4, 1.1005, side='sell', position=3)
+        assert journal.stats()['profit_factor'] == 2.0
+    finally:
+        journal.close()
+
+
+def test_record_close_scores_an_outside_close(tmp_path):
+    journal = TradeJournal(str(tmp_path / 'journal.db'))
+    try:
+        fill(journal, 1, 1.1000)
+        assert journal.open_tickets() == {1}
+        assert journal.record_close(1, 1.0990, profit=-10.5)
+        assert not journal.record_close(1, 1.0990)  # already closed
+        journal.flush()
+        assert journal.open_tickets() == set()
+        assert journal.stats()['avg_loss'] == 10.5
+        assert journal.trades()[0]['profit'] == -10.5
+    finally:
+        journal.close()
@@ -0,0 +1,21 @@
+# test_levels.py
+import pandas as pd
+import pytest
+
+from levels import identify_levels, identify_levels_loop, levels_to_dicts, synthetic_bars
+
+
+@pytest.mark.parametrize('symbol', ['EURUSD', 'GBPUSD'])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_vectorized_matches_loop(symbol, seed):
+    df = synthetic_bars(symbol, 2000, seed)
+    expected = identify_levels_loop(df)
+    assert expected  # the comparison means nothing without any levels
+    assert levels_to_dicts(identify_levels(df)) == expected
+
+
+@pytest.mark.parametrize('count', [0, 1, 4, 5])
+def test_short_frames(count):
+    df = synthetic_bars('EURUSD', count) if count else pd.DataFrame(
+        columns=['time', 'open', 'high', 'low', 'close', 'symbol'])
+    assert levels_to_dicts(identify_levels(df)) == identify_levels_loop(df)
@@ -0,0 +1,44 @@
+# test_news.py
+import json
+from datetime import datetime, timedelta, timezone
+
+from news import FileSource, NewsCalendar, parse_calendar_json
+
+
+def utc_iso(moment):
+    return moment.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def test_offset_times_parse_to_naive_local():
+    event = datetime.now().replace(microsecond=0) + timedelta(minutes=5)
+    text = json.dumps([{'time': utc_iso(event), 'title': 'NFP', 'currency': 'USD'},
+                       {'time': event.astimezone(timezone.utc).isoformat(), 'title': 'CPI'}])
+    events = parse_calendar_json(text)
+    assert [e['time'] for e in events] == [event, event]
+    assert all(e['time'].tzinfo is None for e in events)
+
+
+def test_is_news_time_with_utc_event(tmp_path):
+    event = datetime.now().replace(microsecond=0) + timedelta(minutes=5)
+    source = tmp_path / 'events.json'
+    source.write_text(json.dumps([{'time': utc_iso(event), 'title': 'NFP', 'currency': 'USD'}]))
+
+    calendar = NewsCalendar(FileSource(str(source)), path=str(tmp_path / 'saved.json'))
+    assert calendar.refresh()
+    assert calendar.is_news_time()
+    assert not calendar.is_news_time(event + timedelta(hours=1))
+
+
+def test_saved_calendar_with_offsets_loads_naive(tmp_path):
+    event = datetime.now().replace(microsecond=0) + timedelta(minutes=5)
+    saved = tmp_path / 'saved.json'
+    saved.write_text(json.dumps({
+        'last_updated': datetime.now(timezone.utc).isoformat(),
+        'source': 'test',
+        'events': [{'time': utc_iso(event), 'title': 'NFP', 'currency': 'USD'}],
+    }))
+
+    calendar = NewsCalendar(FileSource(str(tmp_path / 'missing.json')), path=str(saved))
+    assert calendar.last_updated.tzinfo is None
+    assert not calendar.is_stale()
+    assert calendar.is_news_time()
@@ -0,0 +1,58 @@
+# test_serialization.py
+import gzip
+import json
+
+import pandas as pd
+import pytest
+
+from bar_store import BarStore
+from mt5_gateway import TIMEFRAME_M1
+import serialization
+from serialization import GZIP_MIN_BYTES, EncodedBody, encode_chart
+
+
+def iterrows_chart(bars):
+    """The /api/chart body as it was built before serialization.py"""
+    df = pd.DataFrame(bars)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    chart_data = []
+    for _, row in df.iterrows():
+        chart_data.append({
+            'time': row['time'].isoformat(),
+            'open': row['open'],
+            'high': row['high'],
+            'low': row['low'],
+            'close': row['close']
+        })
+    return chart_data
+
+
+@pytest.fixture
+def bars(sim_gateway):
+    return BarStore().bars('EURUSD', TIMEFRAME_M1, 1500)
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_rows_match_the_iterrows_output(bars, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, 'orjson', None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson not installed")
+    body, content_type = encode_chart(bars, 'rows')
+    expected = json.dumps(iterrows_chart(bars), separators=(',', ':')).encode()
+    assert content_type == 'application/json'
+    assert body == expected
+
+
+def test_encoded_body_compresses_once(monkeypatch):
+    body = EncodedBody(b'{"x":1}' * GZIP_MIN_BYTES)
+    calls = []
+    compress = gzip.compress
+    monkeypatch.setattr(gzip, 'compress', lambda *a: calls.append(1) or compress(*a))
+
+    for _ in range(3):
+        data, encoding = body.for_client('gzip, deflate')
+        assert encoding == 'gzip' and gzip.decompress(data) == body.raw
+    assert len(calls) == 1
+    assert body.for_client(None) == (body.raw, None)
+    assert EncodedBody(b'{}').for_client('gzip') == (b'{}', None)
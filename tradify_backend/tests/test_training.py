@@ -0,0 +1,29 @@
+# test_training.py
+import numpy as np
+
+from backtest import BAR_DTYPE, EXIT_PIP, simulate_exits
+from levels import synthetic_bars
+from training import labeled_candidates
+
+
+def bar_array(df):
+    bars = np.zeros(len(df), dtype=BAR_DTYPE)
+    bars['time'] = df['time'].to_numpy().astype('datetime64[s]').astype(np.int64)
+    for field in ('open', 'high', 'low', 'close'):
+        bars[field] = df[field].to_numpy()
+    return bars
+
+
+def test_only_take_profit_exits_are_labeled_wins():
+    bars = bar_array(synthetic_bars('EURUSD', 30000))
+    bar_index, _, _, _, label = labeled_candidates(bars, 'EURUSD', max_hold_bars=10)
+
+    # EURUSD candidates are all sells
+    sell = np.zeros(len(bar_index), bool)
+    entry, _, exit_price = simulate_exits(bars, bar_index + 1, sell, 20, 10, 10, 1.0)
+    take_profit = np.isclose(exit_price, entry - 20 * EXIT_PIP, rtol=0, atol=1e-9)
+    in_profit = exit_price < entry
+
+    assert take_profit.any()
+    assert (in_profit & ~take_profit).any()  # time-outs closing in profit...
+    assert np.array_equal(label == 1, take_profit)  # ...are not wins
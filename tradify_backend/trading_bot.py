@@ -1,43 +1,87 @@
 # trading_bot.py
 import os
 import json
+import logging
+import threading
 import time
-import pandas as pd
 import numpy as np
 import xgboost as xgb
 from datetime import datetime, timedelta
-import requests
-from bs4 import BeautifulSoup
-import MetaTrader5 as mt5
-import ta
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+
+from bar_store import BarStore
+from features import build_feature_rows, consecutive_candles, engulfing_pattern, pip_size_for
+from indicators import IncrementalIndicators, snapshot
+from journal import TradeJournal
+from levels import LEVEL_TYPES, find_levels, identify_levels, levels_to_dicts
+from log_config import configure_logging
+from metrics import BAR_CLOSE_DELAY, FEATURES, INFERENCE, LEVELS, SIGNAL_CYCLE, SIGNALS
+from model_registry import ModelRegistry
+from mt5_gateway import get_gateway, mt5
+from news import NewsCalendar, source_from
+from order_dispatcher import OrderDispatcher
+from scheduler import EventScheduler, timeframe_name
+from sharding import ShardPool
+from training import history_files, train_from_history
+
+logger = logging.getLogger(__name__)
+
+# The strategy trades these two against each other; other symbols on the
+# watchlist are evaluated but never paired
+PAIR_SYMBOLS = ('EURUSD', 'GBPUSD')
+
 
 class ForexTradingBot:
     def __init__(self):
         # Initialize configuration
-        self.symbols = ['EURUSD', 'GBPUSD', 'GBPUSD']
+        # TRADIFY_SYMBOLS widens the watchlist, e.g. EURUSD,GBPUSD,USDJPY
+        watchlist = os.environ.get('TRADIFY_SYMBOLS', ','.join(PAIR_SYMBOLS))
+        self.symbols = list(dict.fromkeys(s.strip() for s in watchlist.split(',') if s.strip()))
         self.trading_hours = self.get_current_session_hours()
         self.timeframe = mt5.TIMEFRAME_M15
         self.lot_size = 0.1  # Default, can be changed via frontend
-        self.model = None
+        self.model = None  # Replaced whole by the registry on each hot-swap
+        self.history_dir = 'history'  # CSV/Parquet bars for train_model
         self.ml_threshold = 0.7  # Confidence threshold for ML predictions
+        self.batch_inference = True  # Score all symbols with one predict call
+        self.evaluation_timeframes = [mt5.TIMEFRAME_M1]  # Bar closes that trigger a signal check
+        # Worker processes to spread symbols over (TRADIFY_SHARDS); 0 or 1 evaluates in-process
+        self.shards = int(os.environ.get('TRADIFY_SHARDS', 0))
+        self.shard_pool = None
         
         # Initialize MT5 connection
         if not mt5.initialize():
-            print("MT5 initialization failed")
+            logger.error("MT5 initialization failed", extra={'error': mt5.last_error()})
             mt5.shutdown()
             raise ConnectionError("Failed to connect to MT5")
         else:
-            print("MT5 successfully connected to account")
             account_info = mt5.account_info()
-            print(account_info)
+            logger.info("MT5 connected", extra={
+                'login': getattr(account_info, 'login', None),
+                'server': getattr(account_info, 'server', None)})
         
-        # Load ML model or train if not exists
+        # Load ML model or train if not exists, without blocking startup
+        self.model_registry = ModelRegistry()
+        self.model_registry.on_swap.append(self.set_model)
         self.load_or_train_model()
         
-        # Initialize news cache
-        self.news_cache = {'last_updated': None, 'events': []}
+        # Bars shared by the strategy and the API, refreshed incrementally
+        self.bar_store = BarStore()
+        
+        # Concurrent order submission for multi-leg opens and close_all
+        self.order_dispatcher = OrderDispatcher()
+        self.trade_lock = threading.Lock()
+        
+        # Every signal, order and fill, with running win/loss totals for /api/stats
+        self.journal = TradeJournal()
+        
+        # Running indicator state per symbol, warmed up from history
+        self.indicator_engines = {}
+        self.indicator_warmup = 1000
+        
+        # News calendar, refreshed off the signal path; TRADIFY_NEWS_SOURCE
+        # may point at a saved page or JSON event list for offline runs
+        self.news = NewsCalendar(source_from(os.environ.get('TRADIFY_NEWS_SOURCE')))
+        self.news.start()
         
     def get_current_session_hours(self):
         """Get trading hours based on current month"""
@@ -67,21 +111,38 @@ class ForexTradingBot:
         return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
     
     def load_or_train_model(self):
-        """Load trained XGBoost model or train new one"""
-        model_path = 'xgboost_model.model'
-        
-        if os.path.exists(model_path):
-            self.model = xgb.Booster()
-            self.model.load_model(model_path)
-            print("Loaded trained XGBoost model")
+        """Load the latest registered model, or train one, in the background"""
+        if self.model_registry.latest_version() is not None:
+            self.model_registry.activate_async()
         else:
-            print("Training new XGBoost model...")
-            self.train_model()
+            logger.info("No registered model, training a new one")
+            threading.Thread(target=self.train_and_publish, name='model-trainer',
+                             daemon=True).start()
+        # Pick up versions published later (e.g. by training.py --publish)
+        self.model_registry.watch()
+    
+    def set_model(self, version, booster):
+        """Swap in a new Booster; a single assignment, so readers see old or new"""
+        self.model = booster
+    
+    def train_and_publish(self):
+        """Train a model, then register and activate it"""
+        self.train_model()
+        version = self.model_registry.publish('xgboost_model.model')
+        self.model_registry.activate(version)
     
     def train_model(self):
         """Train XGBoost model from historical data"""
-        # This would be replaced with actual training data from the text files
-        # For now we'll create dummy data
+        # Real training needs bar history (see training.py); without it we
+        # fall back to a placeholder model on random data
+        paths = history_files(self.history_dir) if os.path.isdir(self.history_dir) else []
+        if paths:
+            self.model = train_from_history(paths, 'xgboost_model.model')
+            return
+        logger.warning("No bar history, training a placeholder model",
+                       extra={'history_dir': self.history_dir})
+        from sklearn.model_selection import train_test_split  # only this fallback needs sklearn
+        
         X = np.random.rand(1000, 10)  # 10 features
         y = np.random.randint(0, 2, 1000)  # Binary classification
         
@@ -102,120 +163,40 @@ class ForexTradingBot:
         
         # Save model
         self.model.save_model('xgboost_model.model')
-        print("Model trained and saved")
+        logger.info("Model trained and saved", extra={'path': 'xgboost_model.model'})
     
     def fetch_forex_factory_news(self):
         """Fetch high-impact news events from Forex Factory"""
-        url = "https://www.forexfactory.com/calendar"
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        news_events = []
-        for event in soup.select('.calendar__row.calendar__row--high'):
-            time = event.select_one('.calendar__time').text.strip()
-            currency = event.select_one('.calendar__currency').text.strip()
-            title = event.select_one('.calendar__event-title').text.strip()
-            
-            if currency == 'USD':
-                news_events.append({
-                    'time': time,
-                    'title': title,
-                    'currency': currency
-                })
-        
-        self.news_cache = {
-            'last_updated': datetime.now(),
-            'events': news_events
-        }
-        return news_events
+        self.news.refresh()
+        return self.news.events
     
     def is_news_time(self):
         """Check if current time is within 15 minutes of high-impact news"""
-        if not self.news_cache['events'] or \
-           (datetime.now() - self.news_cache['last_updated']) > timedelta(hours=1):
-            self.fetch_forex_factory_news()
-        
-        for event in self.news_cache['events']:
-            # Parse event time and compare with current time
-            # This is simplified - would need proper time parsing
-            event_time = datetime.strptime(event['time'], "%H:%M").time()
-            current_time = datetime.now().time()
-            
-            if abs((datetime.combine(datetime.today(), event_time) - 
-                   datetime.combine(datetime.today(), current_time)).total_seconds()) <= 900:
-                return True
-        return False
+        # Answers from the indexed calendar; never waits on the network
+        return self.news.is_news_time()
     
-    # def get_price_data(self, symbol, count=100):
-    #     """Get historical price data for a symbol"""
-    #     rates = mt5.copy_rates_from_pos(symbol, self.timeframe, 0, count)
-    #     df = pd.DataFrame(rates)
-    #     df['time'] = pd.to_datetime(df['time'], unit='s')
-    #     return df
-    def get_price_data(self, symbol):
-        # Ensure symbol is available
-        if not mt5.symbol_select(symbol, True):
-            print(f"Symbol '{symbol}' not found or could not be selected")
-            return pd.DataFrame()
-
-        # Try fetching 100 M1 bars
-        rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M1, 0, 100)
-
-        if rates is None or len(rates) == 0:
-            print(f"No rates data returned for symbol '{symbol}'")
-            return pd.DataFrame()
+    def get_price_data(self, symbol, count=100, closed=False):
+        """Get recent M1 bars for a symbol as a DataFrame
 
-        df = pd.DataFrame(rates)
-
-        if 'time' not in df.columns:
-            print(f"'time' column missing in data for symbol '{symbol}'")
-            return pd.DataFrame()
-
-        df['time'] = pd.to_datetime(df['time'], unit='s')
-        return df
+        With closed=True the forming bar is dropped, so the last row is
+        the candle that just closed.
+        """
+        if not closed:
+            return self.bar_store.frame(symbol, mt5.TIMEFRAME_M1, count)
+        return self.bar_store.frame(symbol, mt5.TIMEFRAME_M1, count + 1).iloc[:-1]
+    
+    def get_price_bars(self, symbol, count=100, closed=False):
+        """Get recent M1 bars as a zero-copy structured array (or None)"""
+        if not closed:
+            return self.bar_store.bars(symbol, mt5.TIMEFRAME_M1, count)
+        bars = self.bar_store.bars(symbol, mt5.TIMEFRAME_M1, count + 1)
+        return bars[:-1] if bars is not None and len(bars) > 1 else None
 
     def identify_support_resistance(self, df):
         """Identify support and resistance levels"""
-        # This is a simplified version - would need more sophisticated logic
-        levels = []
-        
-        # Identify local minima (support) and maxima (resistance)
-        for i in range(2, len(df)-2):
-            if df['low'][i] < df['low'][i-1] and df['low'][i] < df['low'][i+1]:
-                # Support level
-                level = {
-                    'price': df['low'][i],
-                    'type': 'support',
-                    'time': df['time'][i]
-                }
-                # Round to appropriate decimal places
-                if 'GBPUSD' in df['symbol'].iloc[0]:
-                    level['price'] = round(level['price'], 3)
-                    if level['price'] * 1000 % 10 == 0:  # Third decimal is 0
-                        levels.append(level)
-                else:  # EURUSD
-                    level['price'] = round(level['price'], 5)
-                    if level['price'] * 100000 % 10 == 0:  # Fifth decimal is 0
-                        levels.append(level)
-            
-            if df['high'][i] > df['high'][i-1] and df['high'][i] > df['high'][i+1]:
-                # Resistance level
-                level = {
-                    'price': df['high'][i],
-                    'type': 'resistance',
-                    'time': df['time'][i]
-                }
-                # Round to appropriate decimal places
-                if 'GBPUSD' in df['symbol'].iloc[0]:
-                    level['price'] = round(level['price'], 3)
-                    if level['price'] * 1000 % 10 == 0:  # Third decimal is 0
-                        levels.append(level)
-                else:  # EURUSD
-                    level['price'] = round(level['price'], 5)
-                    if level['price'] * 100000 % 10 == 0:  # Fifth decimal is 0
-                        levels.append(level)
-        
-        return levels
+        # Vectorized in levels.py; the original loop lives on there as
+        # identify_levels_loop for benchmarking
+        return levels_to_dicts(identify_levels(df))
     
     def check_engulfing_pattern(self, df, index):
         """Check for bullish/bearish engulfing pattern"""
@@ -253,84 +234,176 @@ class ForexTradingBot:
             return (df.iloc[index]['close'] < df.iloc[index]['open'] and
                     df.iloc[index-1]['close'] < df.iloc[index-1]['open'])
     
-    def generate_features(self, df, levels):
+    def get_indicators(self, symbol, times, closes, closed=False):
+        """Indicator values at the latest bar, updated incrementally"""
+        # Engines hold state for closed bars only. With closed=True every
+        # element has closed and all are committed; otherwise the last one
+        # is the forming bar and is previewed without being committed
+        if not closed:
+            times, closes, forming = times[:-1], closes[:-1], closes[-1]
+        engine = self.indicator_engines.get(symbol)
+        if engine is None or not engine.covers(times):
+            engine = self.indicator_engines[symbol] = IncrementalIndicators()
+            history = self.get_price_bars(symbol, self.indicator_warmup, closed=True)
+            if history is not None:
+                engine.sync(history['time'], history['close'])
+        values = engine.sync(times, closes)
+        return snapshot(values if closed else engine.preview(forming))
+    
+    def generate_features(self, df, levels, closed=False):
         """Generate features for ML model"""
-        features = []
+        symbol = df['symbol'].iloc[0]
+        open_, close = df['open'].to_numpy(), df['close'].to_numpy()
+        times = df['time'].to_numpy().astype('datetime64[s]').astype(np.int64)
+        last = len(close) - 1
         
         # Technical indicators
-        df['rsi'] = ta.RSI(df['close'], timeperiod=14)
-        df['macd'], df['macd_signal'], _ = ta.MACD(df['close'])
-        df['sma_50'] = ta.SMA(df['close'], timeperiod=50)
-        df['sma_200'] = ta.SMA(df['close'], timeperiod=200)
-        
-        # Support/resistance features
-        for level in levels:
-            # Distance to nearest support/resistance
-            # Price action at levels
-            # Add more relevant features
-            pass
-        
-        # Convert to numpy array
-        return np.array(features)
-    
-    def get_trading_signal(self):
-        """Generate trading signal based on strategy rules and ML model"""
-        now = datetime.now()
-        
-        # Check if we're in trading hours
-        if not (self.trading_hours['look_start'] <= now <= self.trading_hours['newyork_end']):
-            return None
+        indicators = self.get_indicators(symbol, times, close, closed)
         
-        # Check for news events
-        if self.is_news_time():
-            return {'action': 'close_all', 'reason': 'news_event'}
-        
-        # Get price data for all symbols
+        # Support/resistance features, one row per level at the latest bar
+        return build_feature_rows(
+            indicators, close[last:],
+            np.zeros(len(levels), dtype=np.int64),
+            [level['price'] for level in levels],
+            [LEVEL_TYPES.index(level['type']) for level in levels],
+            engulfing_pattern(open_, close)[last:],
+            consecutive_candles(open_, close)[last:],
+            pip_size_for(symbol))
+    
+    def level_signal(self, symbol, level, confidence):
+        """Map a confirmed level on a symbol to a signal dict"""
+        if level['type'] == 'support':
+            direction = 'bullish' if symbol == 'GBPUSD' else 'bearish'
+        else:  # resistance
+            direction = 'bearish' if symbol == 'GBPUSD' else 'bullish'
+        return {
+            'symbol': symbol,
+            'direction': direction,
+            'level': level,
+            'confidence': confidence
+        }
+    
+    def evaluate_signals(self, closed=False):
+        """Score each candidate level with its own prediction call"""
+        model = self.model  # One model for the whole pass, even across a hot-swap
         signals = []
         for symbol in self.symbols:
-            df = self.get_price_data(symbol)
+            df = self.get_price_data(symbol, closed=closed)
+            if df.empty:
+                continue
             df['symbol'] = symbol
             
             # Identify support/resistance levels
-            levels = self.identify_support_resistance(df)
+            with LEVELS.time():
+                levels = self.identify_support_resistance(df)
             
             # Check for trading opportunities at each level
+            last = len(df) - 1
             for level in levels:
                 # Check price is near level (within 5 pips)
                 current_price = df.iloc[-1]['close']
-                pip_size = 0.0001 if 'GBPUSD' not in symbol else 0.001
+                pip_size = pip_size_for(symbol)
                 
                 if abs(current_price - level['price']) <= 5 * pip_size:
                     # Check for engulfing pattern or consecutive candles
-                    engulfing = self.check_engulfing_pattern(df, -1)
-                    consecutive_bullish = self.check_consecutive_candles(df, -1, 'bullish')
-                    consecutive_bearish = self.check_consecutive_candles(df, -1, 'bearish')
+                    engulfing = self.check_engulfing_pattern(df, last)
+                    consecutive_bullish = self.check_consecutive_candles(df, last, 'bullish')
+                    consecutive_bearish = self.check_consecutive_candles(df, last, 'bearish')
                     
                     if engulfing or consecutive_bullish or consecutive_bearish:
                         # Generate features for ML model
-                        features = self.generate_features(df, levels)
+                        with FEATURES.time():
+                            features = self.generate_features(df, [level], closed)
                         
                         # Get ML prediction
                         dmatrix = xgb.DMatrix(features.reshape(1, -1))
-                        prediction = self.model.predict(dmatrix)[0]
+                        start = time.perf_counter()
+                        prediction = model.predict(dmatrix)[0]
+                        elapsed = time.perf_counter() - start
+                        INFERENCE.observe(elapsed, mode='single')
+                        self.model_registry.record_latency(elapsed * 1000)
                         
                         if prediction >= self.ml_threshold:
-                            if level['type'] == 'support':
-                                signals.append({
-                                    'symbol': symbol,
-                                    'direction': 'bullish' if symbol == 'GBPUSD' else 'bearish',
-                                    'level': level,
-                                    'confidence': prediction
-                                })
-                            else:  # resistance
-                                signals.append({
-                                    'symbol': symbol,
-                                    'direction': 'bearish' if symbol == 'GBPUSD' else 'bullish',
-                                    'level': level,
-                                    'confidence': prediction
-                                })
+                            signals.append(self.level_signal(symbol, level, prediction))
+        return signals
+    
+    def evaluate_signals_batched(self, closed=False):
+        """Score every candidate across all symbols with one predict call
+
+        With closed=True (a bar-close trigger) the signal bar is the candle
+        that just closed, as in the backtest; otherwise it is the forming bar.
+        """
+        model = self.model  # One model for the whole pass, even across a hot-swap
+        rows = []
+        candidates = []
+        for symbol in dict.fromkeys(self.symbols):
+            bars = self.get_price_bars(symbol, closed=closed)
+            if bars is None:
+                continue
+            open_, close = bars['open'], bars['close']
+            last = len(close) - 1
+            
+            # Cheap filters first: pattern on the latest bar, then proximity
+            engulfing = engulfing_pattern(open_, close)
+            consecutive = consecutive_candles(open_, close)
+            if not (engulfing[last] or consecutive[last]):
+                continue
+            
+            with LEVELS.time():
+                levels = find_levels(bars['time'].view('datetime64[s]'),
+                                     bars['low'], bars['high'], symbol)
+            pip_size = pip_size_for(symbol)
+            near = levels[np.abs(close[last] - levels['price']) <= 5 * pip_size]
+            if not len(near):
+                continue
+            
+            with FEATURES.time():
+                rows.append(build_feature_rows(
+                    self.get_indicators(symbol, bars['time'], close, closed), close[last:],
+                    np.zeros(len(near), dtype=np.int64), near['price'], near['type'],
+                    engulfing[last:], consecutive[last:], pip_size))
+            candidates.extend((symbol, level) for level in levels_to_dicts(near))
+        
+        if not rows:
+            return []
+        
+        # One inplace_predict over the stacked matrix skips building a
+        # DMatrix per candidate, which costs more than the prediction
+        X = np.vstack(rows)
+        start = time.perf_counter()
+        predictions = model.inplace_predict(X)
+        elapsed = time.perf_counter() - start
+        INFERENCE.observe(elapsed, mode='batched')
+        self.model_registry.record_latency(elapsed * 1000, len(X))
+        accepted = np.flatnonzero(predictions >= self.ml_threshold)
+        return [self.level_signal(*candidates[i], predictions[i]) for i in accepted]
+    
+    def get_trading_signal(self, closed=False):
+        """Generate trading signal based on strategy rules and ML model"""
+        now = datetime.now()
+        
+        # Check if we're in trading hours
+        if not (self.trading_hours['look_start'] <= now <= self.trading_hours['newyork_end']):
+            return None
+        
+        # Check for news events
+        if self.is_news_time():
+            return {'action': 'close_all', 'reason': 'news_event'}
+        
+        # No model until the background load or training finishes
+        if self.model is None:
+            return None
+        
+        # Get price data for all symbols
+        if self.shard_pool is not None:
+            signals = self.shard_pool.evaluate(self.ml_threshold, closed)
+        elif self.batch_inference:
+            signals = self.evaluate_signals_batched(closed)
+        else:
+            signals = self.evaluate_signals(closed)
         
         # Process signals according to strategy rules
+        signals = [signal for signal in signals if signal['symbol'] in PAIR_SYMBOLS]
         if signals:
             # For now, just take the first signal
             signal = signals[0]
@@ -341,84 +414,205 @@ class ForexTradingBot:
                     'action': 'open',
                     'symbols': ['EURUSD', 'GBPUSD'],
                     'direction': 'sell' if signal['direction'] == 'bullish' else 'buy',
-                    'reason': 'DXY_signal'
+                    'reason': 'DXY_signal',
+                    'trigger': signal
                 }
             else:  # EURUSD
                 return {
                     'action': 'open',
                     'symbols': ['EURUSD', 'GBPUSD'],
                     'direction': signal['direction'],
-                    'reason': 'EURUSD_signal'
+                    'reason': 'EURUSD_signal',
+                    'trigger': signal
                 }
         
         return None
     
-    def execute_trade(self, signal):
+    def execute_trade(self, signal, signal_id=None):
         """Execute trade based on signal"""
+        # Legs are priced and sent concurrently by the order dispatcher
         if signal['action'] == 'open':
+            requests = []
             for symbol in signal['symbols']:
-                request = {
+                requests.append({
                     "action": mt5.TRADE_ACTION_DEAL,
                     "symbol": symbol,
                     "volume": self.lot_size,
                     "type": mt5.ORDER_TYPE_BUY if signal['direction'] == 'buy' else mt5.ORDER_TYPE_SELL,
-                    "price": mt5.symbol_info_tick(symbol).ask if signal['direction'] == 'buy' else mt5.symbol_info_tick(symbol).bid,
                     "deviation": 10,
                     "magic": 123456,
                     "comment": signal['reason'],
                     "type_time": mt5.ORDER_TIME_GTC,
                     "type_filling": mt5.ORDER_FILLING_IOC,
-                }
-                
-                result = mt5.order_send(request)
-                if result.retcode != mt5.TRADE_RETCODE_DONE:
-                    print(f"Failed to open {symbol} trade: {result.comment}")
+                })
+            
+            for outcome in self.order_dispatcher.submit_all(requests):
+                symbol = outcome['request']['symbol']
+                result = outcome['result']
+                self.journal.record_order(outcome, signal['direction'], signal_id)
+                if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+                    logger.error("Failed to open trade", extra={
+                        'symbol': symbol, 'error': self.order_error(result),
+                        'latency_ms': round(outcome['latency_ms'], 1)})
                 else:
-                    print(f"Opened {symbol} {signal['direction']} trade at {result.price}")
+                    logger.info("Opened trade", extra={
+                        'symbol': symbol, 'direction': signal['direction'], 'price': result.price,
+                        'latency_ms': round(outcome['latency_ms'], 1),
+                        'attempts': outcome['attempts']})
         
         elif signal['action'] == 'close_all':
             positions = mt5.positions_get()
+            if positions is None:
+                logger.error("positions_get() failed", extra={'error': mt5.last_error()})
+                return
+            
+            requests = []
             for pos in positions:
-                request = {
+                requests.append({
                     "action": mt5.TRADE_ACTION_DEAL,
                     "position": pos.ticket,
                     "symbol": pos.symbol,
                     "volume": pos.volume,
                     "type": mt5.ORDER_TYPE_BUY if pos.type == mt5.ORDER_TYPE_SELL else mt5.ORDER_TYPE_SELL,
-                    "price": mt5.symbol_info_tick(pos.symbol).bid if pos.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(pos.symbol).ask,
                     "deviation": 10,
                     "magic": 123456,
                     "comment": "Closing before news",
                     "type_time": mt5.ORDER_TIME_GTC,
                     "type_filling": mt5.ORDER_FILLING_IOC,
-                }
-                
-                result = mt5.order_send(request)
-                if result.retcode != mt5.TRADE_RETCODE_DONE:
-                    print(f"Failed to close {pos.symbol} trade: {result.comment}")
+                })
+            
+            for outcome in self.order_dispatcher.submit_all(requests):
+                symbol = outcome['request']['symbol']
+                result = outcome['result']
+                side = 'buy' if outcome['request']['type'] == mt5.ORDER_TYPE_BUY else 'sell'
+                self.journal.record_order(outcome, side, signal_id)
+                if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+                    logger.error("Failed to close trade", extra={
+                        'symbol': symbol, 'error': self.order_error(result),
+                        'latency_ms': round(outcome['latency_ms'], 1)})
                 else:
-                    print(f"Closed {pos.symbol} trade at {result.price}")
+                    logger.info("Closed trade", extra={
+                        'symbol': symbol, 'price': result.price,
+                        'latency_ms': round(outcome['latency_ms'], 1),
+                        'attempts': outcome['attempts']})
+    
+    def order_error(self, result):
+        """Readable reason for a failed order_send"""
+        return result.comment if result is not None else mt5.last_error()
+    
+    def reconcile_journal(self):
+        """Journal trades the terminal closed without an order from the bot
+
+        Manual closes, stop-outs and stop loss/take profit hits never pass
+        through execute_trade, so any open journal ticket with no matching
+        position is closed from its deal history.
+        """
+        tickets = self.journal.open_tickets()
+        if not tickets:
+            return
+        positions = mt5.positions_get()
+        if positions is None:
+            logger.error("positions_get() failed", extra={'error': mt5.last_error()})
+            return
+        
+        for ticket in tickets - {pos.ticket for pos in positions}:
+            deals = mt5.history_deals_get(position=ticket) or ()
+            exits = [deal for deal in deals if deal.entry != mt5.DEAL_ENTRY_IN]
+            if not exits:
+                continue  # history not synced yet; try again next cycle
+            profit = sum(deal.profit + deal.commission + deal.swap + getattr(deal, 'fee', 0.0)
+                         for deal in deals)
+            # Stamped when found: deal times are server time, the journal's are local
+            if self.journal.record_close(ticket, exits[-1].price, profit):
+                logger.info("Journalled trade closed outside the bot", extra={
+                    'ticket': ticket, 'symbol': exits[-1].symbol, 'price': exits[-1].price,
+                    'profit': round(profit, 2)})
+    
+    def on_bar_close(self, symbols, timeframe):
+        """Evaluate the strategy when a bar closes"""
+        symbol = next(iter(symbols))
+        last_time = self.bar_store.last_time(symbol, timeframe)
+        if last_time is not None:
+            # The newest bar opened when the previous one closed; both in server time
+            now = self.scheduler.clock.time() + self.scheduler.server_offset(symbol)
+            BAR_CLOSE_DELAY.observe(max(now - last_time, 0), timeframe=timeframe_name(timeframe))
+        
+        start = time.perf_counter()
+        # A close fired this, so judge the candle that closed, not the new one
+        signal = self.get_trading_signal(closed=True)
+        action = signal['action'] if signal else 'none'
+        SIGNAL_CYCLE.observe(time.perf_counter() - start, outcome=action)
+        SIGNALS.inc(action=action)
+        
+        if signal:
+            signal_id = self.journal.record_signal(signal, self.model_registry.version)
+            # Timeframes fire on separate workers; trade one signal at a time
+            with self.trade_lock:
+                self.execute_trade(signal, signal_id)
+        
+        # After the trade, so catching up on outside closes never delays it
+        with self.trade_lock:
+            self.reconcile_journal()
     
     def run(self):
         """Main trading loop"""
-        print("Starting trading bot...")
+        logger.info("Starting trading bot", extra={'symbols': ','.join(dict.fromkeys(self.symbols))})
+        
+        # Evaluate on each close of the bars the strategy reads, rather than
+        # sleeping through fixed 15 minute slots
+        self.scheduler = EventScheduler(self.bar_store, clock=get_gateway().clock)
+        close_symbols = dict.fromkeys(self.symbols)
+        if self.shards > 1:
+            # The workers pull their own symbols' bars, so only the traded
+            # legs are watched here; waiting on the whole watchlist would
+            # make every cycle grow with it
+            close_symbols = (dict.fromkeys(s for s in PAIR_SYMBOLS if s in close_symbols)
+                             or dict.fromkeys(self.symbols[:1]))
+        for timeframe in self.evaluation_timeframes:
+            self.scheduler.on_bar_close(close_symbols, timeframe, self.on_bar_close)
+        
+        if self.shards > 1:
+            # Workers score their symbols on their own cores; this process
+            # keeps pairing, orders and the journal
+            self.shard_pool = ShardPool(self.symbols, self.shards)
+            self.shard_pool.start(self.model_registry.version, get_gateway().clock)
+            self.model_registry.on_swap.append(self.shard_pool.set_model)
         
         try:
-            while True:
-                signal = self.get_trading_signal()
-                
-                if signal:
-                    self.execute_trade(signal)
-                
-                # Sleep for 15 minutes (aligned with candle close)
-                time.sleep(60 * 15 - (time.time() % (60 * 15)))
-                
+            self.scheduler.run()
         except KeyboardInterrupt:
-            print("Stopping trading bot...")
+            logger.info("Stopping trading bot")
         finally:
+            self.scheduler.stop()
+            if self.shard_pool is not None:
+                self.shard_pool.stop()
+            self.order_dispatcher.shutdown()
+            self.journal.close()
             mt5.shutdown()
 
 
+
+class ShardEvaluator(ForexTradingBot):
+    """The evaluation half of the bot, for a sharding.py worker process
+
+    Fetches bars for its own symbols and scores them. The coordinating
+    bot owns the journal, orders and pairing, so none of that (nor the
+    news calendar or training) is set up here.
+    """
+    
+    def __init__(self, symbols, version=None):
+        self.symbols = list(symbols)
+        self.ml_threshold = 0.7
+        self.model = None
+        self.model_registry = ModelRegistry()
+        self.model_registry.on_swap.append(self.set_model)
+        self.model_registry.activate(version)
+        self.bar_store = BarStore()
+        self.indicator_engines = {}
+        self.indicator_warmup = 1000
+
+
 if __name__ == "__main__":
+    configure_logging()
     bot = ForexTradingBot()
     bot.run()
\ No newline at end of file
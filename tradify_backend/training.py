@@ -0,0 +1,174 @@
+# training.py
+import argparse
+import glob
+import logging
+import os
+
+import numpy as np
+import xgboost as xgb
+
+from backtest import EXIT_PIP, level_candidates, load_bars, simulate_exits, symbol_from_path
+from features import build_feature_rows, compute_indicators, pip_size_for
+from levels import RESISTANCE
+from log_config import configure_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARAMS = {
+    'objective': 'binary:logistic',
+    'tree_method': 'hist',
+    'max_depth': 5,
+    'eta': 0.1,
+    'subsample': 0.8,
+    'eval_metric': 'logloss',
+    'nthread': os.cpu_count() or 1,
+}
+
+
+def labeled_candidates(bars, symbol, take_profit_pips=20, stop_loss_pips=10,
+                       max_hold_bars=60, spread_pips=1.0):
+    """Candidate bar/level pairs with a win/loss label
+
+    A candidate is labeled 1 when the trade the bot would place on it,
+    filled at the next bar's open, reaches take-profit before stop-loss
+    or time-out.
+    """
+    bar_index, levels, engulfing, consecutive = level_candidates(bars, symbol)
+    tradable = bar_index + 1 < len(bars)
+    bar_index, levels = bar_index[tradable], levels[tradable]
+
+    # Same side mapping as backtest.select_signals
+    buy = (levels['type'] == RESISTANCE) if 'GBPUSD' in symbol else np.zeros(len(levels), bool)
+    entry_price, _, exit_price = simulate_exits(bars, bar_index + 1, buy, take_profit_pips,
+                                                stop_loss_pips, max_hold_bars, spread_pips)
+    # Only a take-profit exit counts; a time-out that closes in profit is a 0
+    take_profit = entry_price + np.where(buy, 1, -1) * take_profit_pips * EXIT_PIP
+    label = np.isclose(exit_price, take_profit, rtol=0, atol=EXIT_PIP / 100).astype(np.float32)
+    return bar_index, levels, engulfing, consecutive, label
+
+
+class CandidateIter(xgb.DataIter):
+    """Stream feature batches symbol by symbol, never holding the full matrix
+
+    Each pass reloads one history file at a time, so memory is bounded by
+    the largest single file plus one batch. `part` selects the older
+    (train) or newer (valid) slice of each symbol's candidates.
+    """
+
+    def __init__(self, paths, part='train', valid_fraction=0.2, batch_rows=250000,
+                 cache_prefix=None, **label_args):
+        self.paths = list(paths)
+        self.part = part
+        self.valid_fraction = valid_fraction
+        self.batch_rows = batch_rows
+        self.label_args = label_args
+        self.rows = 0
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def _generate(self):
+        self.rows = 0
+        for path in self.paths:
+            symbol = symbol_from_path(path)
+            bars = load_bars(path)
+            bar_index, levels, engulfing, consecutive, label = labeled_candidates(
+                bars, symbol, **self.label_args)
+
+            # Time-ordered split so validation is always later than training
+            cut = int(len(bar_index) * (1 - self.valid_fraction))
+            part = slice(0, cut) if self.part == 'train' else slice(cut, None)
+            bar_index, levels, label = bar_index[part], levels[part], label[part]
+            if not len(bar_index):
+                continue
+
+            indicators = compute_indicators(bars['close'])
+            for start in range(0, len(bar_index), self.batch_rows):
+                chunk = slice(start, start + self.batch_rows)
+                X = build_feature_rows(indicators, bars['close'], bar_index[chunk],
+                                       levels['price'][chunk], levels['type'][chunk],
+                                       engulfing, consecutive, pip_size_for(symbol))
+                self.rows += len(X)
+                yield X, label[chunk]
+
+    def next(self, input_data):
+        if self._batches is None:
+            self._batches = self._generate()
+        try:
+            X, y = next(self._batches)
+        except StopIteration:
+            return 0
+        input_data(data=X, label=y)
+        return 1
+
+    def reset(self):
+        self._batches = None
+
+
+def train_from_history(paths, out_path='xgboost_model.model', params=None,
+                       num_boost_round=2000, early_stopping_rounds=50,
+                       external_memory=False, cache_dir='xgb_cache', **label_args):
+    """Train the signal model on labeled candidates from history files"""
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+
+    if external_memory:
+        # Pages spill to disk under cache_dir instead of living in RAM
+        os.makedirs(cache_dir, exist_ok=True)
+        train_iter = CandidateIter(paths, 'train', cache_prefix=os.path.join(cache_dir, 'train'),
+                                   **label_args)
+        valid_iter = CandidateIter(paths, 'valid', cache_prefix=os.path.join(cache_dir, 'valid'),
+                                   **label_args)
+        dtrain = xgb.DMatrix(train_iter)
+        dvalid = xgb.DMatrix(valid_iter)
+    else:
+        # Quantized as it streams in, so only the compressed bins are kept
+        train_iter = CandidateIter(paths, 'train', **label_args)
+        valid_iter = CandidateIter(paths, 'valid', **label_args)
+        dtrain = xgb.QuantileDMatrix(train_iter, max_bin=params.get('max_bin', 256))
+        dvalid = xgb.QuantileDMatrix(valid_iter, ref=dtrain)
+
+    logger.info("Training model", extra={'train_rows': dtrain.num_row(),
+                                         'valid_rows': dvalid.num_row()})
+    model = xgb.train(params, dtrain, num_boost_round=num_boost_round,
+                      evals=[(dtrain, 'train'), (dvalid, 'valid')],
+                      early_stopping_rounds=early_stopping_rounds, verbose_eval=50)
+
+    # Drop the rounds after the best validation score
+    model = model[:model.best_iteration + 1]
+    model.save_model(out_path)
+    logger.info("Saved model", extra={'rounds': model.num_boosted_rounds(), 'path': out_path})
+    return model
+
+
+def history_files(directory):
+    """CSV/Parquet bar files in a directory"""
+    return sorted(glob.glob(os.path.join(directory, '*.parquet')) +
+                  glob.glob(os.path.join(directory, '*.csv')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the signal model on historical bars")
+    parser.add_argument('paths', nargs='+', help="Bar files named <SYMBOL>[_...].ext, or directories")
+    parser.add_argument('--out', default='xgboost_model.model')
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--early-stopping', type=int, default=50)
+    parser.add_argument('--external-memory', action='store_true',
+                        help="Page the training matrix to disk instead of quantizing in RAM")
+    parser.add_argument('--nthread', type=int, default=DEFAULT_PARAMS['nthread'])
+    parser.add_argument('--publish', metavar='DIR',
+                        help="Also register the model as a new version in this model registry")
+    args = parser.parse_args()
+    configure_logging()
+
+    paths = []
+    for path in args.paths:
+        paths.extend(history_files(path) if os.path.isdir(path) else [path])
+
+    train_from_history(paths, args.out, {'nthread': args.nthread}, args.rounds,
+                       args.early_stopping, args.external_memory)
+    if args.publish:
+        from model_registry import ModelRegistry
+        ModelRegistry(args.publish).publish(args.out)
+
+
+if __name__ == "__main__":
+    main()